@@ -26,6 +26,112 @@ CORS_ORIGINS: list[str] = [
     o.strip() for o in os.environ.get("CORS_ORIGINS", "").strip().split(",") if o.strip()
 ]
 
-# In-memory store caps (avoid unbounded growth)
+# Conversation store backend: "memory" (default, resets on restart) or "sqlite" (disk-backed)
+STORE_BACKEND: str = os.environ.get("STORE_BACKEND", "memory").strip().lower()
+if STORE_BACKEND not in ("memory", "sqlite"):
+    STORE_BACKEND = "memory"
+STORE_SQLITE_PATH: str = os.environ.get("STORE_SQLITE_PATH", "flux.db").strip() or "flux.db"
+# sqlite: hot conversations kept in memory; dirty ones flushed every interval or once the batch fills
+STORE_CACHE_SIZE: int = max(1, int(os.environ.get("STORE_CACHE_SIZE", "1000")))
+STORE_FLUSH_INTERVAL_MS: int = max(10, int(os.environ.get("STORE_FLUSH_INTERVAL_MS", "200")))
+STORE_FLUSH_BATCH: int = max(1, int(os.environ.get("STORE_FLUSH_BATCH", "100")))
+
+# In-memory store caps (avoid unbounded growth); MAX_CONVERSATIONS applies to the memory backend
 MAX_CONVERSATIONS: int = max(1, int(os.environ.get("MAX_CONVERSATIONS", "5000")))
 MAX_MESSAGES_PER_CONVERSATION: int = max(1, min(500, int(os.environ.get("MAX_MESSAGES_PER_CONVERSATION", "100"))))
+
+# Pooled upstream HTTP clients (one per provider, shared across requests)
+HTTP_MAX_CONNECTIONS: int = max(1, int(os.environ.get("HTTP_MAX_CONNECTIONS", "100")))
+HTTP_MAX_KEEPALIVE_CONNECTIONS: int = max(0, int(os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")))
+HTTP_KEEPALIVE_EXPIRY: float = max(0.0, float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "30")))
+HTTP_CONNECT_TIMEOUT: float = max(0.1, float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5")))
+# HTTP/2 requires the optional h2 package (pip install "httpx[http2]"); falls back to HTTP/1.1
+HTTP_HTTP2: bool = os.environ.get("HTTP_HTTP2", "").strip().lower() in ("1", "true", "yes")
+
+# Upstream retries: per-call cap on total retry time, longest single wait, and a global
+# retry budget (retries may be at most RETRY_BUDGET_RATIO of calls, plus a small per-second floor)
+RETRY_MAX_TOTAL_SEC: float = max(0.0, float(os.environ.get("RETRY_MAX_TOTAL_SEC", "30")))
+RETRY_MAX_BACKOFF_SEC: float = max(0.0, float(os.environ.get("RETRY_MAX_BACKOFF_SEC", "30")))
+RETRY_BUDGET_RATIO: float = max(0.0, float(os.environ.get("RETRY_BUDGET_RATIO", "0.1")))
+RETRY_BUDGET_MIN_PER_SEC: float = max(0.0, float(os.environ.get("RETRY_BUDGET_MIN_PER_SEC", "1")))
+
+# Tavily search result cache (in-process TTL + LRU). 0 entries disables it.
+TAVILY_CACHE_MAX_ENTRIES: int = max(0, int(os.environ.get("TAVILY_CACHE_MAX_ENTRIES", "1000")))
+TAVILY_CACHE_TTL_SEC: float = max(0.0, float(os.environ.get("TAVILY_CACHE_TTL_SEC", "600")))
+TAVILY_CACHE_NEWS_TTL_SEC: float = max(0.0, float(os.environ.get("TAVILY_CACHE_NEWS_TTL_SEC", "60")))
+
+# Cohere per-document score cache, keyed by (model, normalized query, document hash)
+COHERE_SCORE_CACHE_MAX_ENTRIES: int = max(0, int(os.environ.get("COHERE_SCORE_CACHE_MAX_ENTRIES", "20000")))
+COHERE_SCORE_CACHE_TTL_SEC: float = max(0.0, float(os.environ.get("COHERE_SCORE_CACHE_TTL_SEC", "3600")))
+
+# /answer cache: reuse a synthesized answer for the same query, filters, model and sources
+ANSWER_CACHE_MAX_ENTRIES: int = max(0, int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", "500")))
+ANSWER_CACHE_TTL_SEC: float = max(0.0, float(os.environ.get("ANSWER_CACHE_TTL_SEC", "300")))
+
+# Tavily request hedging: after the running latency percentile (clamped to min/max delay),
+# send one backup request and keep the first response. Hedges are capped at MAX_RATE of calls.
+TAVILY_HEDGE_ENABLED: bool = os.environ.get("TAVILY_HEDGE_ENABLED", "").strip().lower() in ("1", "true", "yes")
+TAVILY_HEDGE_MAX_RATE: float = max(0.0, min(1.0, float(os.environ.get("TAVILY_HEDGE_MAX_RATE", "0.05"))))
+TAVILY_HEDGE_PERCENTILE: float = max(50.0, min(99.9, float(os.environ.get("TAVILY_HEDGE_PERCENTILE", "95"))))
+TAVILY_HEDGE_MIN_DELAY_MS: float = max(0.0, float(os.environ.get("TAVILY_HEDGE_MIN_DELAY_MS", "300")))
+TAVILY_HEDGE_MAX_DELAY_MS: float = max(TAVILY_HEDGE_MIN_DELAY_MS, float(os.environ.get("TAVILY_HEDGE_MAX_DELAY_MS", "5000")))
+
+# Circuit breakers (one per upstream): open when FAILURE_RATE of the last WINDOW calls
+# (at least MIN_CALLS) failed or were slower than the slow-call threshold; fail fast for OPEN_SEC,
+# then let HALF_OPEN_CALLS trial calls through.
+BREAKER_FAILURE_RATE: float = max(0.01, min(1.0, float(os.environ.get("BREAKER_FAILURE_RATE", "0.5"))))
+BREAKER_WINDOW: int = max(1, int(os.environ.get("BREAKER_WINDOW", "20")))
+BREAKER_MIN_CALLS: int = max(1, int(os.environ.get("BREAKER_MIN_CALLS", "10")))
+BREAKER_OPEN_SEC: float = max(0.0, float(os.environ.get("BREAKER_OPEN_SEC", "30")))
+BREAKER_HALF_OPEN_CALLS: int = max(1, int(os.environ.get("BREAKER_HALF_OPEN_CALLS", "3")))
+BREAKER_SLOW_CALL_SEC: float = max(0.1, float(os.environ.get("BREAKER_SLOW_CALL_SEC", "10")))
+BREAKER_GEMINI_SLOW_CALL_SEC: float = max(0.1, float(os.environ.get("BREAKER_GEMINI_SLOW_CALL_SEC", "30")))
+
+# Request deadline: X-Request-Timeout-Ms header or this default, capped at the max. Each stage gets
+# only the time remaining; Cohere rerank is skipped when less than COHERE_MIN_BUDGET_MS is left
+# (after reserving SYNTHESIS_RESERVE_MS for Gemini on /answer and conversation messages).
+REQUEST_TIMEOUT_MS: int = max(1, int(os.environ.get("REQUEST_TIMEOUT_MS", "45000")))
+REQUEST_TIMEOUT_MAX_MS: int = max(REQUEST_TIMEOUT_MS, int(os.environ.get("REQUEST_TIMEOUT_MAX_MS", "120000")))
+COHERE_MIN_BUDGET_MS: int = max(0, int(os.environ.get("COHERE_MIN_BUDGET_MS", "1500")))
+SYNTHESIS_RESERVE_MS: int = max(0, int(os.environ.get("SYNTHESIS_RESERVE_MS", "5000")))
+# Single-flight: a request joins an identical in-flight upstream call whose deadline is at most
+# this much earlier than its own (otherwise it starts its own call)
+SINGLEFLIGHT_JOIN_SLACK_MS: int = max(0, int(os.environ.get("SINGLEFLIGHT_JOIN_SLACK_MS", "2000")))
+
+# Local BM25F ranker (title + content): Cohere fallback and optional pre-filter. With
+# RERANK_PREFILTER_TOP_N > 0, only the local top N (at least the requested limit) go to Cohere.
+LOCAL_RERANK_ENABLED: bool = os.environ.get("LOCAL_RERANK_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+RERANK_PREFILTER_TOP_N: int = max(0, int(os.environ.get("RERANK_PREFILTER_TOP_N", "0")))
+BM25_K1: float = max(0.0, float(os.environ.get("BM25_K1", "1.2")))
+BM25_B: float = min(1.0, max(0.0, float(os.environ.get("BM25_B", "0.75"))))
+BM25_TITLE_WEIGHT: float = max(0.0, float(os.environ.get("BM25_TITLE_WEIGHT", "2.0")))
+BM25_CONTENT_WEIGHT: float = max(0.0, float(os.environ.get("BM25_CONTENT_WEIGHT", "1.0")))
+
+# Duplicate collapsing before rerank: same canonical URL, or SimHash of title + content
+# within DEDUP_SIMHASH_MAX_DISTANCE bits (of 64)
+DEDUP_ENABLED: bool = os.environ.get("DEDUP_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+DEDUP_SIMHASH_MAX_DISTANCE: int = min(64, max(0, int(os.environ.get("DEDUP_SIMHASH_MAX_DISTANCE", "3"))))
+
+# POST /search/batch: max queries per request and how many run at once per batch
+SEARCH_BATCH_MAX_ITEMS: int = max(1, int(os.environ.get("SEARCH_BATCH_MAX_ITEMS", "50")))
+SEARCH_BATCH_CONCURRENCY: int = max(1, int(os.environ.get("SEARCH_BATCH_CONCURRENCY", "8")))
+# Each batch item gets REQUEST_TIMEOUT_MS from when it starts running (not while it queues);
+# the whole batch is capped by X-Request-Timeout-Ms or this default
+SEARCH_BATCH_TIMEOUT_MS: int = max(1, int(os.environ.get("SEARCH_BATCH_TIMEOUT_MS", "120000")))
+
+# Conversation history in prompts: last HISTORY_VERBATIM_TURNS turns verbatim, older turns folded
+# into a rolling summary (background Gemini call once HISTORY_COMPACT_MIN_TURNS have aged out);
+# the whole history is capped at HISTORY_TOKEN_BUDGET estimated tokens
+HISTORY_COMPACTION_ENABLED: bool = os.environ.get("HISTORY_COMPACTION_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+HISTORY_VERBATIM_TURNS: int = max(0, int(os.environ.get("HISTORY_VERBATIM_TURNS", "4")))
+HISTORY_COMPACT_MIN_TURNS: int = max(1, int(os.environ.get("HISTORY_COMPACT_MIN_TURNS", "2")))
+HISTORY_TOKEN_BUDGET: int = max(100, int(os.environ.get("HISTORY_TOKEN_BUDGET", "4000")))
+HISTORY_SUMMARY_MAX_WORDS: int = max(20, int(os.environ.get("HISTORY_SUMMARY_MAX_WORDS", "250")))
+
+# Response compression negotiated from Accept-Encoding: zstd and br when their packages
+# (zstandard, brotli) are installed, gzip always. Bodies under COMPRESSION_MIN_BYTES are sent as-is.
+COMPRESSION_ENABLED: bool = os.environ.get("COMPRESSION_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+COMPRESSION_MIN_BYTES: int = max(0, int(os.environ.get("COMPRESSION_MIN_BYTES", "1024")))
+COMPRESSION_GZIP_LEVEL: int = min(9, max(1, int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6"))))
+COMPRESSION_ZSTD_LEVEL: int = min(22, max(1, int(os.environ.get("COMPRESSION_ZSTD_LEVEL", "3"))))
+COMPRESSION_BROTLI_QUALITY: int = min(11, max(0, int(os.environ.get("COMPRESSION_BROTLI_QUALITY", "4"))))
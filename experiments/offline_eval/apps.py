@@ -107,7 +107,8 @@ class BaselineRAGApp:
 
         try:
             retrieval_start = time.perf_counter()
-            data = tavily_search(config.TAVILY_API_KEY, query, max_results=10, topic="general")
+            # Uncached: retrieval_ms must time a real Tavily call on every run
+            data = tavily_search(config.TAVILY_API_KEY, query, max_results=10, topic="general", use_cache=False)
             retrieval_ms = (time.perf_counter() - retrieval_start) * 1000
             results = data.get("results") or []
             top5 = results[:5]
@@ -3,23 +3,25 @@
 Pipeline: query → Tavily retrieval → Cohere rerank → return.
 Routers: health, search, answer, contents, conversations.
 """
+import asyncio
 import logging
-import uuid
 from contextlib import asynccontextmanager
 
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import JSONResponse, RedirectResponse
+from starlette.responses import RedirectResponse
 
 import config
 from routers import health, search, answer, contents, conversations
-from utils.responses import PrettyJSONResponse
+from services import http_clients
+from store import close_store
+from utils.compression import CompressionMiddleware
+from utils.middleware import BodySizeLimitMiddleware, RequestIDMiddleware
+from utils.responses import PrettyJSONResponse, output_format, wants_pretty
 from utils.safe_errors import (
     redact_message,
     safe_internal_message,
@@ -34,11 +36,16 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """App lifespan: no startup/shutdown logic; in-memory store resets on restart."""
-    yield
-    logger.info("Flux API shutting down, waiting for in-flight requests...")
-    await asyncio.sleep(3)
-    logger.info("Flux API shutdown complete")
+    """App lifespan: open pooled upstream clients; on shutdown close them and flush/close the conversation store."""
+    http_clients.open_clients()
+    try:
+        yield
+    finally:
+        logger.info("Flux API shutting down, waiting for in-flight requests...")
+        await asyncio.sleep(3)
+        await http_clients.close_clients()
+        close_store()
+        logger.info("Flux API shutdown complete")
 
 
 app = FastAPI(
@@ -46,6 +53,8 @@ app = FastAPI(
     description="Live web search with semantic reranking for AI apps",
     version="0.1.0",
     lifespan=lifespan,
+    # Compact JSON unless the request asks for ?pretty=true (see utils/responses.py)
+    dependencies=[Depends(output_format)],
 )
 
 if config.CORS_ORIGINS:
@@ -59,40 +68,13 @@ if config.CORS_ORIGINS:
     )
 
 
-# Max request body size (1MB). Reject early when Content-Length exceeds this.
+# Max request body size (1MB). Enforced on Content-Length and on the bytes actually read.
 MAX_BODY_BYTES = 1 * 1024 * 1024
 
-
-class BodySizeLimitMiddleware(BaseHTTPMiddleware):
-    """Reject requests with Content-Length over MAX_BODY_BYTES with 413."""
-
-    async def dispatch(self, request: Request, call_next):
-        content_length = request.headers.get("content-length")
-        if content_length:
-            try:
-                if int(content_length) > MAX_BODY_BYTES:
-                    return JSONResponse(
-                        status_code=413,
-                        content={"error": "Request body too large", "code": "PAYLOAD_TOO_LARGE"},
-                    )
-            except ValueError:
-                pass
-        return await call_next(request)
-
-
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    """Set X-Request-ID on request and response for tracing."""
-
-    async def dispatch(self, request: Request, call_next):
-        request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
-        request.state.request_id = request_id
-        response = await call_next(request)
-        response.headers["X-Request-ID"] = request_id
-        return response
-
-
+# Added first so it runs innermost, inside request ID and body limit
+app.add_middleware(CompressionMiddleware)
 app.add_middleware(RequestIDMiddleware)
-app.add_middleware(BodySizeLimitMiddleware)
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=MAX_BODY_BYTES)
 
 app.include_router(health.router)
 app.include_router(search.router)
@@ -121,7 +103,9 @@ if _demo_dir.is_dir():
 @app.exception_handler(RequestValidationError)
 async def validation_handler(request, exc: RequestValidationError):
     """Invalid request body or query params → 400 INVALID_BODY."""
-    return PrettyJSONResponse(status_code=400, content={"error": str(exc), "code": "INVALID_BODY"})
+    return PrettyJSONResponse(
+        status_code=400, content={"error": str(exc), "code": "INVALID_BODY"}, pretty=wants_pretty(request)
+    )
 
 
 @app.exception_handler(Exception)
@@ -129,4 +113,6 @@ async def global_handler(request, exc: Exception):
     """Unhandled exception → 500 INTERNAL; log full traceback."""
     logger.exception("Unhandled exception")
     safe_msg = safe_internal_message()
-    return PrettyJSONResponse(status_code=500, content={"error": safe_msg, "code": "INTERNAL"})
+    return PrettyJSONResponse(
+        status_code=500, content={"error": safe_msg, "code": "INTERNAL"}, pretty=wants_pretty(request)
+    )
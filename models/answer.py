@@ -18,3 +18,4 @@ class AnswerResponse(BaseModel):
     answer: str
     citations: list[Citation]
     model: str = "gemini-2.5-flash"
+    cached: bool = Field(False, description="True when the answer was served from the answer cache")
@@ -12,7 +12,7 @@ class Message(BaseModel):
     query: str = Field(description="User query for this turn")
     answer: str = Field(description="Synthesized answer")
     citations: list[Citation] = Field(description="Source citations")
-    results: list[SearchResult] = Field(description="Search results used")
+    results: list[SearchResult] = Field(description="Search results used (empty when include_results=false)")
     created_at: str = Field(description="ISO 8601 timestamp")
 
 
@@ -22,7 +22,8 @@ class Conversation(BaseModel):
     id: str = Field(description="Unique conversation ID (UUID)")
     created_at: str = Field(description="ISO 8601 timestamp")
     message_count: int = Field(description="Number of messages")
-    messages: list[Message] = Field(description="All messages in order")
+    messages: list[Message] = Field(description="Messages in order (all, or the requested page)")
+    has_more: bool = Field(False, description="More messages exist beyond this page in the paging direction")
 
 
 class ConversationListItem(BaseModel):
@@ -34,12 +35,13 @@ class ConversationListItem(BaseModel):
 
 
 class ConversationListResponse(BaseModel):
-    """Paginated list of conversations."""
+    """Paginated list of conversations (page/page_size or keyset cursor)."""
 
     conversations: list[ConversationListItem]
     total: int = Field(description="Total conversations in store")
-    page: int = Field(description="Current page number")
+    page: int | None = Field(description="Current page number (null when paging by cursor)")
     page_size: int = Field(description="Page size used")
+    next_cursor: str | None = Field(None, description="Pass as cursor to fetch the next page; null on the last page")
 
 
 class AddMessageRequest(BaseModel):
@@ -1,6 +1,8 @@
-"""Search response models: single result and full response with rerank flag."""
+"""Search response models: single result and full response with rerank flag; batch search."""
 from pydantic import BaseModel, Field
 
+from models.error import ErrorResponse
+
 
 class SearchResult(BaseModel):
     """One reranked search hit: url, title, snippet, Cohere score, rank."""
@@ -9,7 +11,7 @@ class SearchResult(BaseModel):
     url: str
     title: str
     snippet: str = Field(description="Clean extracted text excerpt, 150–300 chars")
-    score: float = Field(description="Cohere relevance score, 0.0–1.0")
+    score: float = Field(description="Relevance score, 0.0–1.0 (Cohere, or local BM25F when Cohere is unavailable)")
     rank: int = Field(description="Position in results (1-indexed)")
 
 
@@ -19,4 +21,42 @@ class SearchResponse(BaseModel):
     query: str
     results: list[SearchResult]
     total: int
-    reranked: bool = Field(description="False only if Cohere call failed")
+    reranked: bool = Field(
+        description="True when Cohere scored the results (ranker is cohere). False when Cohere did not run "
+        "or failed: no Cohere key, open circuit breaker, upstream error, or too little request time "
+        "left after the synthesis reserve; ranker then says what ordered the results"
+    )
+    ranker: str = Field("cohere", description="Ranking used: cohere, local (BM25F fallback) or none (Tavily order)")
+    collapsed: int = Field(0, description="Duplicate results (same canonical URL or near-identical text) removed before ranking")
+
+
+class BatchSearchQuery(BaseModel):
+    """One query in a batch: same parameters as GET /search."""
+
+    q: str = Field(description="Natural language query")
+    limit: int = Field(10, ge=1, le=20)
+    topic: str | None = Field(None, description="news or general")
+    days: int | None = Field(None, ge=1)
+
+
+class BatchSearchRequest(BaseModel):
+    """Request body for POST /search/batch."""
+
+    queries: list[BatchSearchQuery] = Field(description="Queries to run (max SEARCH_BATCH_MAX_ITEMS)")
+
+
+class BatchSearchItem(BaseModel):
+    """Outcome of one batch query: the /search response or its error, with the HTTP status /search would return."""
+
+    index: int = Field(description="Position of the query in the request")
+    status: int = Field(description="HTTP status GET /search would have returned")
+    result: SearchResponse | None = None
+    error: ErrorResponse | None = None
+
+
+class BatchSearchResponse(BaseModel):
+    """Response for POST /search/batch: one item per query, in input order."""
+
+    results: list[BatchSearchItem]
+    succeeded: int = Field(description="Items with status 200")
+    failed: int = Field(description="Items with an error")
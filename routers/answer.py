@@ -1,14 +1,23 @@
-"""GET /answer — synthesized answer from live web sources with citations."""
+"""GET /answer — synthesized answer from live web sources with citations.
+
+GET /answer/stream — same pipeline as Server-Sent Events: citations first, then answer tokens.
+"""
 import logging
-from fastapi import APIRouter, Query
+from contextlib import aclosing
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 import config
 from utils.responses import PrettyJSONResponse
+from utils.sse import SSE_HEADERS, sse_event
 
 from models.answer import AnswerResponse, Citation
 from models.error import ErrorResponse
-from services.search_flow import run_search
+from models.search import SearchResult
+from services.answer_cache import answer_cache, answer_cache_key
+from services.gemini_service import gemini_stream_async
+from services.search_flow import generate_answer_async, run_search_async
+from utils.deadline import DEADLINE_ERROR, Deadline, is_deadline_error, request_deadline
 from utils.safe_errors import redact_message
-from services.gemini_service import gemini_generate
 
 router = APIRouter(tags=["answer"])
 logger = logging.getLogger(__name__)
@@ -37,22 +46,8 @@ def _build_prompt(query: str, sources: list[tuple[str, str]]) -> str:
     return "\n".join(parts)
 
 
-@router.get(
-    "/answer",
-    response_model=AnswerResponse,
-    response_class=PrettyJSONResponse,
-    responses={
-        400: {"model": ErrorResponse},
-        404: {"model": ErrorResponse},
-        502: {"model": ErrorResponse},
-    },
-)
-def answer(
-    q: str = Query(..., description="Natural language query"),
-    topic: str | None = Query(None),
-    days: int | None = Query(None, ge=1),
-):
-    """Synthesized answer: search + rerank → top 5 → Gemini → answer + citations."""
+def _validate_params(q: str, topic: str | None, days: int | None) -> PrettyJSONResponse | None:
+    """Return error response for invalid params or missing keys; else None."""
     if not q or not q.strip():
         return PrettyJSONResponse(
             status_code=400,
@@ -83,44 +78,193 @@ def answer(
             status_code=502,
             content={"error": "Gemini API key not configured", "code": "ANSWER_FAILED"},
         )
+    return None
+
+
+async def _top_sources(
+    q: str, topic: str | None, days: int | None, deadline: Deadline
+) -> tuple[list[SearchResult], PrettyJSONResponse | None]:
+    """Search + rerank (same as /search with limit=10) and take the top 5; or an error response.
 
-    # 1–9. Search + rerank (same as /search with limit=10)
+    Rerank leaves SYNTHESIS_RESERVE_MS of the deadline for Gemini.
+    """
     try:
-        flow = run_search(q.strip(), limit=10, topic=topic or "general", days=days)
+        flow = await run_search_async(
+            q.strip(),
+            limit=10,
+            topic=topic or "general",
+            days=days,
+            deadline=deadline,
+            reserve_sec=config.SYNTHESIS_RESERVE_MS / 1000,
+        )
     except Exception as e:
+        if is_deadline_error(e, deadline):
+            return [], PrettyJSONResponse(status_code=504, content=DEADLINE_ERROR)
         logger.warning("Search failed: %s", e)
-        return PrettyJSONResponse(
+        return [], PrettyJSONResponse(
             status_code=502,
             content={"error": redact_message(str(e)), "code": "TAVILY_ERROR"},
         )
 
     if not flow.results:
-        return PrettyJSONResponse(
+        return [], PrettyJSONResponse(
             status_code=404,
             content={"error": "No results found", "code": "NO_RESULTS"},
         )
+    return flow.results[:5], None
 
-    # 10. Take top 5
-    top5 = flow.results[:5]
-    sources = [(r.title, r.snippet) for r in top5]
 
-    # 11–12. Build prompt, call Gemini
-    prompt = _build_prompt(q.strip(), sources)
-    try:
-        answer_text = gemini_generate(config.GEMINI_API_KEY, prompt, max_tokens=512)
-    except Exception as e:
-        logger.warning("Gemini failed: %s", e)
-        return PrettyJSONResponse(
-            status_code=502,
-            content={"error": redact_message(str(e)), "code": "ANSWER_FAILED"},
-        )
-
-    # 14. Build citations from top 5
-    citations = [
+def _citations(top5: list[SearchResult]) -> list[Citation]:
+    return [
         Citation(title=r.title, url=r.url, score=r.score, rank=r.rank)
         for r in top5
     ]
 
+
+@router.get(
+    "/answer",
+    response_model=AnswerResponse,
+    response_class=PrettyJSONResponse,
+    responses={
+        400: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+        502: {"model": ErrorResponse},
+        504: {"model": ErrorResponse},
+    },
+)
+async def answer(
+    q: str = Query(..., description="Natural language query"),
+    topic: str | None = Query(None),
+    days: int | None = Query(None, ge=1),
+    deadline: Deadline = Depends(request_deadline),
+):
+    """Synthesized answer: search + rerank → top 5 → Gemini → answer + citations."""
+    err = _validate_params(q, topic, days)
+    if err is not None:
+        return err
+
+    # 1–10. Search + rerank, take top 5
+    top5, err = await _top_sources(q, topic, days, deadline)
+    if err is not None:
+        return err
+    sources = [(r.title, r.snippet) for r in top5]
+
+    # 11. Same question, filters and sources answered recently → skip Gemini
+    cache_key = answer_cache_key(q, topic or "general", days, config.GEMINI_MODEL, top5)
+    answer_text = answer_cache.get(cache_key)
+    cached = answer_text is not None
+
+    # 12–13. Build prompt, call Gemini
+    if not cached:
+        prompt = _build_prompt(q.strip(), sources)
+        try:
+            answer_text = await generate_answer_async(prompt, max_tokens=512, deadline=deadline)
+        except Exception as e:
+            if is_deadline_error(e, deadline):
+                return PrettyJSONResponse(status_code=504, content=DEADLINE_ERROR)
+            logger.warning("Gemini failed: %s", e)
+            return PrettyJSONResponse(
+                status_code=502,
+                content={"error": redact_message(str(e)), "code": "ANSWER_FAILED"},
+            )
+        answer_cache.set(cache_key, answer_text)
+
+    # 14. Build citations from top 5
     return AnswerResponse(
-        query=q.strip(), answer=answer_text, citations=citations, model=config.GEMINI_MODEL
+        query=q.strip(),
+        answer=answer_text,
+        citations=_citations(top5),
+        model=config.GEMINI_MODEL,
+        cached=cached,
     )
+
+
+@router.get(
+    "/answer/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"text/event-stream": {}},
+            "description": "SSE events: citations, token (repeated), then done or error",
+        },
+        400: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+        502: {"model": ErrorResponse},
+        504: {"model": ErrorResponse},
+    },
+)
+async def answer_stream(
+    q: str = Query(..., description="Natural language query"),
+    topic: str | None = Query(None),
+    days: int | None = Query(None, ge=1),
+    deadline: Deadline = Depends(request_deadline),
+):
+    """
+    Streaming /answer over Server-Sent Events. Validation and search errors return
+    the usual JSON error; once streaming starts the events are:
+    - citations: {query, citations, model} as soon as search + rerank finish
+    - token: {text} for each answer delta from Gemini
+    - done: the complete AnswerResponse
+    - error: {error, code} if synthesis fails mid-stream or returns no text (ANSWER_FAILED),
+      or DEADLINE_EXCEEDED once the deadline passes
+    """
+    err = _validate_params(q, topic, days)
+    if err is not None:
+        return err
+    top5, err = await _top_sources(q, topic, days, deadline)
+    if err is not None:
+        return err
+
+    query = q.strip()
+    citations = _citations(top5)
+    cache_key = answer_cache_key(q, topic or "general", days, config.GEMINI_MODEL, top5)
+    prompt = _build_prompt(query, [(r.title, r.snippet) for r in top5])
+
+    async def events():
+        yield sse_event(
+            "citations",
+            {
+                "query": query,
+                "citations": [c.model_dump() for c in citations],
+                "model": config.GEMINI_MODEL,
+            },
+        )
+        answer_text = answer_cache.get(cache_key)
+        cached = answer_text is not None
+        if cached:
+            yield sse_event("token", {"text": answer_text})
+        else:
+            parts: list[str] = []
+            try:
+                async with aclosing(
+                    gemini_stream_async(config.GEMINI_API_KEY, prompt, max_tokens=512, deadline=deadline)
+                ) as stream:
+                    async for text in stream:
+                        if deadline.expired:
+                            yield sse_event("error", DEADLINE_ERROR)
+                            return
+                        parts.append(text)
+                        yield sse_event("token", {"text": text})
+            except Exception as e:
+                if is_deadline_error(e, deadline):
+                    yield sse_event("error", DEADLINE_ERROR)
+                    return
+                logger.warning("Gemini stream failed: %s", e)
+                yield sse_event("error", {"error": redact_message(str(e)), "code": "ANSWER_FAILED"})
+                return
+            answer_text = "".join(parts).strip()
+            if not answer_text:
+                # e.g. finishReason SAFETY: fail like /answer does, and cache nothing
+                yield sse_event("error", {"error": "Gemini returned no content", "code": "ANSWER_FAILED"})
+                return
+            answer_cache.set(cache_key, answer_text)
+        done = AnswerResponse(
+            query=query,
+            answer=answer_text,
+            citations=citations,
+            model=config.GEMINI_MODEL,
+            cached=cached,
+        )
+        yield sse_event("done", done.model_dump())
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -6,12 +6,13 @@ import logging
 import re
 from urllib.parse import urlparse
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query
 
 import config
 from models.contents import PageContent
 from models.error import ErrorResponse
-from services.tavily_extract import tavily_extract
+from services.tavily_extract import tavily_extract_async
+from utils.deadline import DEADLINE_ERROR, Deadline, is_deadline_error, request_deadline
 from utils.safe_errors import redact_message
 from utils.responses import PrettyJSONResponse
 
@@ -72,10 +73,12 @@ def _clean_content(raw: str, url: str = "") -> str:
     responses={
         400: {"model": ErrorResponse},
         502: {"model": ErrorResponse},
+        504: {"model": ErrorResponse},
     },
 )
-def contents(
+async def contents(
     urls: str = Query(..., description="Comma-separated list of URLs (max 10)"),
+    deadline: Deadline = Depends(request_deadline),
 ):
     if not urls or not urls.strip():
         return PrettyJSONResponse(
@@ -122,8 +125,10 @@ def contents(
         )
 
     try:
-        data = tavily_extract(config.TAVILY_API_KEY, url_list)
+        data = await tavily_extract_async(config.TAVILY_API_KEY, url_list, deadline=deadline)
     except Exception as e:
+        if is_deadline_error(e, deadline):
+            return PrettyJSONResponse(status_code=504, content=DEADLINE_ERROR)
         logger.warning("Tavily extract failed: %s", e)
         return PrettyJSONResponse(
             status_code=502,
@@ -1,11 +1,14 @@
-"""Conversation endpoints: create, list, get, add message, delete."""
+"""Conversation endpoints: create, list, get, add message (plain or streamed), delete."""
 import logging
 import re
 import uuid
+from contextlib import aclosing
 from datetime import datetime, timezone
+from typing import NamedTuple
 
-from fastapi import APIRouter, Path, Query
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, Path, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 import config
 from models.answer import Citation
@@ -19,17 +22,27 @@ from models.conversation import (
 from models.error import ErrorResponse
 from models.search import SearchResult
 from services.context import build_context_query
-from services.gemini_service import gemini_generate
-from services.search_flow import run_search
+from services.gemini_service import gemini_stream_async
+from services.history import PromptHistory, prompt_history, schedule_compaction
+from services.search_flow import generate_answer_async, run_search_async
 from store import (
+    append_message,
+    conversation_cursor,
     create_conversation,
     delete_conversation,
     get_conversation,
+    conversation_version,
     list_conversations,
-    update_conversation,
+    list_conversations_after,
+    list_version,
+    version_tag,
 )
+from store.records import MessageRecord, ResultRecord
+from utils.conditional import etag_matches, not_modified, validator_headers, weak_etag
 from utils.responses import PrettyJSONResponse
+from utils.deadline import DEADLINE_ERROR, Deadline, is_deadline_error, request_deadline
 from utils.safe_errors import redact_message
+from utils.sse import SSE_HEADERS, sse_event
 
 router = APIRouter(tags=["conversations"])
 logger = logging.getLogger(__name__)
@@ -56,8 +69,8 @@ SYSTEM_INSTRUCTION = (
 )
 
 
-def _build_message_prompt(current_query: str, history: list[tuple[str, str]], sources: list[tuple[str, str]]) -> str:
-    """Build prompt with conversation history and new sources."""
+def _build_message_prompt(current_query: str, history: PromptHistory, sources: list[tuple[str, str]]) -> str:
+    """Build prompt with conversation history (summary of older turns + recent turns) and new sources."""
     parts = [
         SYSTEM_INSTRUCTION,
         "",
@@ -65,9 +78,13 @@ def _build_message_prompt(current_query: str, history: list[tuple[str, str]], so
         "You have context from previous turns in this conversation.",
         "",
     ]
-    if history:
+    if history.summary:
+        parts.append("Summary of earlier conversation:")
+        parts.append(history.summary)
+        parts.append("")
+    if history.turns:
         parts.append("Previous conversation:")
-        for q, a in history:
+        for q, a in history.turns:
             parts.append(f"Q: {q}")
             parts.append(f"A: {a}")
             parts.append("")
@@ -80,27 +97,60 @@ def _build_message_prompt(current_query: str, history: list[tuple[str, str]], so
     return "\n".join(parts).strip()
 
 
-def _store_to_conversation(conv: dict) -> Conversation:
-    """Convert store dict to Conversation model."""
-    messages = [
-        Message(
-            id=m["id"],
-            query=m["query"],
-            answer=m["answer"],
-            citations=[Citation(**c) for c in m["citations"]],
-            results=[SearchResult(**r) for r in m["results"]],
-            created_at=m["created_at"],
-        )
-        for m in conv.get("messages", [])
-    ]
+def _store_to_conversation(
+    conv: dict,
+    messages: list[MessageRecord] | None = None,
+    *,
+    include_results: bool = True,
+    has_more: bool = False,
+) -> Conversation:
+    """Convert store dict to Conversation model (all messages, or the given page of them)."""
+    if messages is None:
+        messages = conv.get("messages", [])
     return Conversation(
         id=conv["id"],
         created_at=conv["created_at"],
         message_count=conv["message_count"],
-        messages=messages,
+        messages=[
+            Message(
+                id=m.id,
+                query=m.query,
+                answer=m.answer,
+                citations=[Citation(**c.citation_dict()) for c in m.citations],
+                results=[SearchResult(**r.to_dict()) for r in m.results] if include_results else [],
+                created_at=m.created_at,
+            )
+            for m in messages
+        ],
+        has_more=has_more,
     )
 
 
+def _select_messages(
+    messages: list[MessageRecord], limit: int | None, before: str | None, after: str | None
+) -> tuple[list[MessageRecord], bool] | None:
+    """
+    Page of messages (chronological) and whether more exist in the paging direction.
+    before: the `limit` newest messages older than that id. after: the `limit` oldest newer
+    than it. Neither: the `limit` newest. Returns None if the cursor id is not in the conversation.
+    """
+    if before is not None or after is not None:
+        cursor = before if before is not None else after
+        idx = next((i for i, m in enumerate(messages) if m.id == cursor), None)
+        if idx is None:
+            return None
+        if before is not None:
+            messages = messages[:idx]
+        else:
+            newer = messages[idx + 1:]
+            if limit is None or len(newer) <= limit:
+                return newer, False
+            return newer[:limit], True
+    if limit is None or len(messages) <= limit:
+        return messages, False
+    return messages[-limit:], True
+
+
 @router.post(
     "/conversations",
     response_model=Conversation,
@@ -125,16 +175,36 @@ def create_conversation_endpoint():
     "/conversations",
     response_model=ConversationListResponse,
     response_class=PrettyJSONResponse,
-    responses={400: {"model": ErrorResponse}},
+    responses={304: {"description": "Not modified (If-None-Match matched the ETag)"}, 400: {"model": ErrorResponse}},
     summary="List conversations",
-    description="List all conversations sorted by creation date (newest first). Messages omitted for performance; use GET /conversations/{id} for full details.",
+    description="List all conversations sorted by creation date (newest first). Messages omitted for performance; use GET /conversations/{id} for full details. Page with `page`/`page_size`, or pass `next_cursor` back as `cursor` for keyset pagination (stable under inserts, same cost at any depth); `cursor` takes precedence over `page`. Responses carry an `ETag`; pollers send it back as `If-None-Match` and get 304 while nothing has changed.",
 )
 def list_conversations_endpoint(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Conversations per page"),
+    cursor: str | None = Query(None, description="next_cursor from a previous page"),
 ):
     """List all conversations with pagination. Messages omitted for brevity."""
-    items, total = list_conversations(page=page, page_size=page_size)
+    etag = weak_etag(list_version())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    if cursor is not None:
+        try:
+            items, total, next_cursor = list_conversations_after(cursor, page_size=page_size)
+        except ValueError:
+            return PrettyJSONResponse(
+                status_code=400,
+                content={"error": "Invalid pagination cursor", "code": "INVALID_CURSOR"},
+            )
+        response_page = None
+    else:
+        items, total = list_conversations(page=page, page_size=page_size)
+        has_more = items and page * page_size < total
+        next_cursor = conversation_cursor(items[-1]) if has_more else None
+        response_page = page
+    response.headers.update(validator_headers(etag))
     return ConversationListResponse(
         conversations=[
             ConversationListItem(
@@ -145,8 +215,9 @@ def list_conversations_endpoint(
             for c in items
         ],
         total=total,
-        page=page,
+        page=response_page,
         page_size=page_size,
+        next_cursor=next_cursor,
     )
 
 
@@ -154,69 +225,92 @@ def list_conversations_endpoint(
     "/conversations/{conversation_id}",
     response_model=Conversation,
     response_class=PrettyJSONResponse,
-    responses={404: {"model": ErrorResponse}},
+    responses={
+        304: {"description": "Not modified (If-None-Match matched the ETag)"},
+        400: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+    },
     summary="Get conversation",
-    description="Retrieve a full conversation including all messages, answers, and search results.",
+    description="Retrieve a full conversation including all messages, answers, and search results. Optional message paging: `limit` returns the newest messages; `before=<message_id>` pages back through older ones; `after=<message_id>` (or `since=<message_id>` for polling) returns only newer messages. `has_more` tells whether another page exists in that direction. `include_results=false` omits each message's search results (citations are kept). Responses carry an `ETag`; send it back as `If-None-Match` to get 304 while the conversation is unchanged.",
 )
 def get_conversation_endpoint(
+    request: Request,
+    response: Response,
     conversation_id: str = Path(..., description="Conversation ID"),
+    limit: int | None = Query(None, ge=1, le=500, description="Max messages to return (default all)"),
+    before: str | None = Query(None, description="Only messages older than this message id"),
+    after: str | None = Query(None, description="Only messages newer than this message id"),
+    since: str | None = Query(None, description="Incremental sync: same as after (messages added since this id)"),
+    include_results: bool = Query(True, description="Include each message's search results"),
 ):
-    """Retrieve full conversation with all messages and results."""
+    """Retrieve a conversation with all messages and results, or one page / the new messages."""
     err = _validate_conversation_id(conversation_id)
     if err is not None:
         return err
-    conv = get_conversation(conversation_id)
+    if sum(c is not None for c in (before, after, since)) > 1:
+        return PrettyJSONResponse(
+            status_code=400,
+            content={"error": "Use only one of before, after, since", "code": "INVALID_MESSAGE_CURSOR"},
+        )
+    # Cheap version check first: an unchanged conversation is not copied or serialized
+    version = conversation_version(conversation_id)
+    if version is not None and etag_matches(request, weak_etag(version)):
+        return not_modified(weak_etag(version))
+    conv = get_conversation(conversation_id) if version is not None else None
     if not conv:
         return PrettyJSONResponse(
             status_code=404,
             content={"error": "Conversation not found", "code": "CONVERSATION_NOT_FOUND"},
         )
-    return _store_to_conversation(conv)
+    selected = _select_messages(conv["messages"], limit, before, after if since is None else since)
+    if selected is None:
+        # Unknown id, or a message already dropped by the message cap: refetch without a cursor
+        return PrettyJSONResponse(
+            status_code=400,
+            content={"error": "Message not found in conversation", "code": "INVALID_MESSAGE_CURSOR"},
+        )
+    messages, has_more = selected
+    response.headers.update(validator_headers(weak_etag(version_tag(conv))))
+    return _store_to_conversation(conv, messages, include_results=include_results, has_more=has_more)
 
 
-@router.post(
-    "/conversations/{conversation_id}/messages",
-    response_model=Message,
-    response_class=PrettyJSONResponse,
-    responses={
-        400: {"model": ErrorResponse},
-        404: {"model": ErrorResponse},
-        502: {"model": ErrorResponse},
-    },
-    summary="Add message",
-    description="Add a query to the conversation. Runs context-aware search (last 3 queries + current) and synthesizes an answer with citations. Reranking uses the current query only.",
-)
-def add_message_endpoint(
-    conversation_id: str = Path(..., description="Conversation ID"),
-    body: AddMessageRequest = ...,
-):
-    """
-    Add a query to the conversation. Runs context-aware search + synthesis.
-    Uses last 3 queries for retrieval context; reranks by current query only.
+class _MessageTurn(NamedTuple):
+    """Validated add-message request: the conversation, current query and Gemini prompt inputs."""
+
+    conv: dict
+    query: str
+    context_query: str
+    history: PromptHistory
+
+
+def _prepare_turn(conversation_id: str, body: AddMessageRequest) -> tuple[_MessageTurn | None, PrettyJSONResponse | None]:
+    """Validate an add-message request. Returns (turn, None) or (None, error response).
+
+    Reads the store: call it from the threadpool in async endpoints.
     """
     err = _validate_conversation_id(conversation_id)
     if err is not None:
-        return err
+        return None, err
     query = (body.query or "").strip()
     if not query:
-        return PrettyJSONResponse(
+        return None, PrettyJSONResponse(
             status_code=400,
             content={"error": "Missing required query field", "code": "MISSING_QUERY"},
         )
     if len(query) > MAX_QUERY_LEN:
-        return PrettyJSONResponse(
+        return None, PrettyJSONResponse(
             status_code=400,
             content={"error": "Query exceeds 500 characters", "code": "QUERY_TOO_LONG"},
         )
 
     conv = get_conversation(conversation_id)
     if not conv:
-        return PrettyJSONResponse(
+        return None, PrettyJSONResponse(
             status_code=404,
             content={"error": "Conversation not found", "code": "CONVERSATION_NOT_FOUND"},
         )
     if conv.get("message_count", 0) >= config.MAX_MESSAGES_PER_CONVERSATION:
-        return PrettyJSONResponse(
+        return None, PrettyJSONResponse(
             status_code=400,
             content={
                 "error": f"Conversation message limit ({config.MAX_MESSAGES_PER_CONVERSATION}) reached",
@@ -225,74 +319,76 @@ def add_message_endpoint(
         )
 
     if not config.TAVILY_API_KEY:
-        return PrettyJSONResponse(
+        return None, PrettyJSONResponse(
             status_code=502,
             content={"error": "Tavily API key not configured", "code": "TAVILY_ERROR"},
         )
     if not config.GEMINI_API_KEY:
-        return PrettyJSONResponse(
+        return None, PrettyJSONResponse(
             status_code=502,
             content={"error": "Gemini API key not configured", "code": "ANSWER_FAILED"},
         )
 
     # Context-aware retrieval: last 3 queries + current → Tavily; rerank uses current only
-    previous_queries = [m["query"] for m in conv.get("messages", [])]
+    previous_queries = [m.query for m in conv.get("messages", [])]
     context_query = build_context_query(query, previous_queries, max_previous=3)
+    return _MessageTurn(conv, query, context_query, prompt_history(conv)), None
+
 
+async def _search_turn(
+    turn: _MessageTurn, deadline: Deadline
+) -> tuple[list[SearchResult], PrettyJSONResponse | None]:
+    """Context-aware search + rerank; returns the top 5 results or an error response."""
     try:
-        flow = run_search(
-            query,
+        flow = await run_search_async(
+            turn.query,
             limit=10,
             topic="general",
             days=None,
-            search_query=context_query,
+            search_query=turn.context_query,
+            deadline=deadline,
+            reserve_sec=config.SYNTHESIS_RESERVE_MS / 1000,
         )
     except Exception as e:
+        if is_deadline_error(e, deadline):
+            return [], PrettyJSONResponse(status_code=504, content=DEADLINE_ERROR)
         logger.warning("Search failed: %s", e)
-        return PrettyJSONResponse(
+        return [], PrettyJSONResponse(
             status_code=502,
             content={"error": redact_message(str(e)), "code": "TAVILY_ERROR"},
         )
 
     if not flow.results:
-        return PrettyJSONResponse(
+        return [], PrettyJSONResponse(
             status_code=404,
             content={"error": "No results found", "code": "NO_RESULTS"},
         )
+    return flow.results[:5], None
 
-    top5 = flow.results[:5]
-    sources = [(r.title, r.snippet) for r in top5]
-
-    history = [(m["query"], m["answer"]) for m in conv.get("messages", [])]
-    prompt = _build_message_prompt(query, history, sources)
-
-    try:
-        answer_text = gemini_generate(config.GEMINI_API_KEY, prompt, max_tokens=512)
-    except Exception as e:
-        logger.warning("Gemini failed: %s", e)
-        return PrettyJSONResponse(
-            status_code=502,
-            content={"error": redact_message(str(e)), "code": "ANSWER_FAILED"},
-        )
 
-    citations = [
+def _citations(top5: list[SearchResult]) -> list[Citation]:
+    return [
         Citation(title=r.title, url=r.url, score=r.score, rank=r.rank)
         for r in top5
     ]
 
+
+def _commit_message(conversation_id: str, query: str, answer_text: str, top5: list[SearchResult]) -> Message | None:
+    """Store the finished turn on the conversation and return it as a Message.
+
+    Returns None if the conversation no longer exists (deleted or evicted during the turn).
+    Writes the store: call it from the threadpool in async endpoints.
+    """
+    citations = _citations(top5)
     message_id = str(uuid.uuid4())
     created_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-    message_data = {
-        "id": message_id,
-        "query": query,
-        "answer": answer_text,
-        "citations": [c.model_dump() for c in citations],
-        "results": [r.model_dump() for r in top5],
-        "created_at": created_at,
-    }
-
-    messages = conv.get("messages", []) + [message_data]
-    update_conversation(conversation_id, len(messages), messages)
+    # Citations are the top 5 results themselves: stored as indexes into the result records
+    results = tuple(ResultRecord(r.id, r.url, r.title, r.snippet, r.score, r.rank) for r in top5)
+    record = MessageRecord(message_id, query, answer_text, created_at, results, tuple(range(len(results))))
+
+    # Append, not read-modify-write: other turns may have been added while this one was searching/synthesizing
+    if not append_message(conversation_id, record):
+        return None
 
     return Message(
         id=message_id,
@@ -304,6 +400,136 @@ def add_message_endpoint(
     )
 
 
+@router.post(
+    "/conversations/{conversation_id}/messages",
+    response_model=Message,
+    response_class=PrettyJSONResponse,
+    responses={
+        400: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+        502: {"model": ErrorResponse},
+        504: {"model": ErrorResponse},
+    },
+    summary="Add message",
+    description="Add a query to the conversation. Runs context-aware search (last 3 queries + current) and synthesizes an answer with citations. Reranking uses the current query only.",
+)
+async def add_message_endpoint(
+    conversation_id: str = Path(..., description="Conversation ID"),
+    body: AddMessageRequest = ...,
+    deadline: Deadline = Depends(request_deadline),
+):
+    """
+    Add a query to the conversation. Runs context-aware search + synthesis.
+    Uses last 3 queries for retrieval context; reranks by current query only.
+    """
+    turn, err = await run_in_threadpool(_prepare_turn, conversation_id, body)
+    if err is not None:
+        return err
+    top5, err = await _search_turn(turn, deadline)
+    if err is not None:
+        return err
+
+    sources = [(r.title, r.snippet) for r in top5]
+    prompt = _build_message_prompt(turn.query, turn.history, sources)
+
+    try:
+        answer_text = await generate_answer_async(prompt, max_tokens=512, deadline=deadline)
+    except Exception as e:
+        if is_deadline_error(e, deadline):
+            return PrettyJSONResponse(status_code=504, content=DEADLINE_ERROR)
+        logger.warning("Gemini failed: %s", e)
+        return PrettyJSONResponse(
+            status_code=502,
+            content={"error": redact_message(str(e)), "code": "ANSWER_FAILED"},
+        )
+
+    message = await run_in_threadpool(_commit_message, conversation_id, turn.query, answer_text, top5)
+    if message is None:
+        return PrettyJSONResponse(
+            status_code=404,
+            content={"error": "Conversation not found", "code": "CONVERSATION_NOT_FOUND"},
+        )
+    schedule_compaction(conversation_id)
+    return message
+
+
+@router.post(
+    "/conversations/{conversation_id}/messages/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"text/event-stream": {}},
+            "description": "SSE events: results, citations, token (repeated), then done or error",
+        },
+        400: {"model": ErrorResponse},
+        404: {"model": ErrorResponse},
+        502: {"model": ErrorResponse},
+        504: {"model": ErrorResponse},
+    },
+    summary="Add message (streaming)",
+    description="Same as Add message, streamed as Server-Sent Events: search results and citations first, then answer tokens, then the stored Message. The message is stored only when the stream completes; if the client disconnects, nothing is stored and the Gemini call is aborted.",
+)
+async def add_message_stream_endpoint(
+    request: Request,
+    conversation_id: str = Path(..., description="Conversation ID"),
+    body: AddMessageRequest = ...,
+    deadline: Deadline = Depends(request_deadline),
+):
+    """
+    Streaming add-message. Validation and search errors return the usual JSON error;
+    once streaming starts the events are results, citations, token (repeated), done
+    (the stored Message), or error ({error, code}) if synthesis fails or returns no text,
+    or the conversation was deleted meanwhile. Nothing is stored unless done is sent.
+    """
+    turn, err = await run_in_threadpool(_prepare_turn, conversation_id, body)
+    if err is not None:
+        return err
+    top5, err = await _search_turn(turn, deadline)
+    if err is not None:
+        return err
+
+    sources = [(r.title, r.snippet) for r in top5]
+    prompt = _build_message_prompt(turn.query, turn.history, sources)
+
+    async def events():
+        yield sse_event("results", {"results": [r.model_dump() for r in top5]})
+        yield sse_event("citations", {"citations": [c.model_dump() for c in _citations(top5)]})
+        parts: list[str] = []
+        try:
+            # aclosing: a disconnect cancels this generator and must close the upstream stream
+            async with aclosing(
+                gemini_stream_async(config.GEMINI_API_KEY, prompt, max_tokens=512, deadline=deadline)
+            ) as stream:
+                async for text in stream:
+                    if deadline.expired:
+                        yield sse_event("error", DEADLINE_ERROR)
+                        return
+                    parts.append(text)
+                    yield sse_event("token", {"text": text})
+        except Exception as e:
+            if is_deadline_error(e, deadline):
+                yield sse_event("error", DEADLINE_ERROR)
+                return
+            logger.warning("Gemini stream failed: %s", e)
+            yield sse_event("error", {"error": redact_message(str(e)), "code": "ANSWER_FAILED"})
+            return
+        answer_text = "".join(parts).strip()
+        if not answer_text:
+            # e.g. finishReason SAFETY: fail like the JSON endpoint, and store no empty turn
+            yield sse_event("error", {"error": "Gemini returned no content", "code": "ANSWER_FAILED"})
+            return
+        if await request.is_disconnected():
+            return
+        message = await run_in_threadpool(_commit_message, conversation_id, turn.query, answer_text, top5)
+        if message is None:
+            yield sse_event("error", {"error": "Conversation not found", "code": "CONVERSATION_NOT_FOUND"})
+            return
+        schedule_compaction(conversation_id)
+        yield sse_event("done", message.model_dump())
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.delete(
     "/conversations/{conversation_id}",
     status_code=204,
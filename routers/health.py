@@ -1,8 +1,16 @@
-"""GET /health — confirms Tavily and Cohere keys are configured."""
+"""GET /health — confirms Tavily and Cohere keys are configured; reports circuit breaker state and retry, cache, coalescing, hedging, store and compression counters."""
 from fastapi import APIRouter
 
 import config
+from services.answer_cache import answer_cache
+from services.cohere_service import score_cache
+from services.search_flow import flight_stats
+from services.tavily import search_cache, search_hedger
+from store import store_stats
+from utils.circuit_breaker import breaker_states
+from utils.compression import compression_stats
 from utils.responses import PrettyJSONResponse
+from utils.retry import retry_budget
 
 router = APIRouter(tags=["utility"])
 
@@ -14,4 +22,17 @@ def health() -> dict:
         "status": "ok",
         "cohere_ready": bool(config.COHERE_API_KEY),
         "tavily_ready": bool(config.TAVILY_API_KEY),
+        "circuit_breakers": breaker_states(),
+        "retry_budget": retry_budget.stats(),
+        "caches": {
+            "tavily_search": search_cache.stats(),
+            "cohere_scores": score_cache.stats(),
+            "answers": answer_cache.stats(),
+        },
+        "singleflight": flight_stats(),
+        "hedging": {
+            "tavily_search": search_hedger.stats(),
+        },
+        "store": store_stats(),
+        "compression": compression_stats(),
     }
@@ -1,20 +1,87 @@
 """GET /search — live web search, Cohere reranked.
 
+POST /search/batch — many searches in one request, run concurrently; JSON or NDJSON stream.
+
 Validate → Tavily → Cohere rerank (or degrade) → SearchResponse. No business logic in router.
 """
+import asyncio
 import logging
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 import config
-from models.search import SearchResponse
+from models.search import (
+    BatchSearchItem,
+    BatchSearchQuery,
+    BatchSearchRequest,
+    BatchSearchResponse,
+    SearchResponse,
+)
 from utils.responses import PrettyJSONResponse
 from models.error import ErrorResponse
-from services.search_flow import run_search
+from services.search_flow import run_search_async
+from utils.deadline import (
+    DEADLINE_ERROR,
+    Deadline,
+    batch_deadline,
+    is_deadline_error,
+    item_deadline,
+    request_deadline,
+)
 from utils.safe_errors import redact_message
 
 router = APIRouter(tags=["search"])
 logger = logging.getLogger(__name__)
 
 
+def _validate_search(q: str, topic: str | None, days: int | None) -> tuple[int, dict] | None:
+    """Return (status, error body) for invalid params or missing key; else None."""
+    # Validate query and optional filters before any external call
+    if not q or not q.strip():
+        return 400, {"error": "Missing required query parameter", "code": "MISSING_QUERY"}
+    if len(q) > 500:
+        return 400, {"error": "Query exceeds 500 characters", "code": "QUERY_TOO_LONG"}
+    if topic is not None and topic not in ("news", "general"):
+        return 400, {"error": "topic must be 'news' or 'general'", "code": "INVALID_TOPIC"}
+    if days is not None and days < 1:
+        return 400, {"error": "days must be >= 1", "code": "INVALID_DAYS"}
+    if not config.TAVILY_API_KEY:
+        return 502, {"error": "Tavily API key not configured", "code": "TAVILY_ERROR"}
+    return None
+
+
+async def _execute_search(
+    q: str, limit: int, topic: str | None, days: int | None, deadline: Deadline
+) -> tuple[int, SearchResponse | dict]:
+    """Validate and run one search. Returns (200, SearchResponse) or (status, error body); never raises."""
+    err = _validate_search(q, topic, days)
+    if err is not None:
+        return err
+
+    try:
+        flow = await run_search_async(
+            q.strip(), limit=limit, topic=topic or "general", days=days, deadline=deadline
+        )
+    except ValueError as e:
+        return 502, {"error": redact_message(str(e)), "code": "TAVILY_ERROR"}
+    except Exception as e:
+        if is_deadline_error(e, deadline):
+            return 504, DEADLINE_ERROR
+        logger.warning("Search failed: %s", e)
+        return 502, {"error": redact_message(str(e)), "code": "TAVILY_ERROR"}
+
+    if not flow.results:
+        return 404, {"error": "No results found", "code": "NO_RESULTS"}
+
+    return 200, SearchResponse(
+        query=q.strip(),
+        results=flow.results,
+        total=len(flow.results),
+        reranked=flow.reranked,
+        ranker=flow.ranker,
+        collapsed=flow.collapsed,
+    )
+
+
 @router.get(
     "/search",
     response_model=SearchResponse,
@@ -23,59 +90,88 @@ logger = logging.getLogger(__name__)
         400: {"model": ErrorResponse},
         404: {"model": ErrorResponse},
         502: {"model": ErrorResponse},
+        504: {"model": ErrorResponse},
     },
 )
-def search(
+async def search(
     q: str = Query(..., description="Natural language query"),
     limit: int = Query(10, ge=1, le=20),
     topic: str | None = Query(None),
     days: int | None = Query(None, ge=1),
+    deadline: Deadline = Depends(request_deadline),
 ):
     """Live web search: validate params → Tavily → Cohere rerank → SearchResponse."""
-    # Validate query and optional filters before any external call
-    if not q or not q.strip():
-        return PrettyJSONResponse(
-            status_code=400,
-            content={"error": "Missing required query parameter", "code": "MISSING_QUERY"},
-        )
-    if len(q) > 500:
-        return PrettyJSONResponse(
-            status_code=400,
-            content={"error": "Query exceeds 500 characters", "code": "QUERY_TOO_LONG"},
-        )
-    if topic is not None and topic not in ("news", "general"):
+    status, body = await _execute_search(q, limit, topic, days, deadline)
+    if status != 200:
+        return PrettyJSONResponse(status_code=status, content=body)
+    return body
+
+
+async def _batch_item(
+    index: int, item: BatchSearchQuery, semaphore: asyncio.Semaphore, deadline: Deadline
+) -> BatchSearchItem:
+    async with semaphore:
+        # The item's budget starts once it runs, so queueing behind others does not eat it
+        status, body = await _execute_search(item.q, item.limit, item.topic, item.days, item_deadline(deadline))
+    if status == 200:
+        return BatchSearchItem(index=index, status=status, result=body)
+    return BatchSearchItem(index=index, status=status, error=ErrorResponse(**body))
+
+
+@router.post(
+    "/search/batch",
+    response_model=BatchSearchResponse,
+    response_class=PrettyJSONResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}},
+            "description": "BatchSearchResponse, or with stream=true one BatchSearchItem per line in completion order",
+        },
+        400: {"model": ErrorResponse},
+    },
+    summary="Batch search",
+    description="Run up to SEARCH_BATCH_MAX_ITEMS searches (same parameters as GET /search) with bounded concurrency. Each item carries its own status and result or error; one failing query does not fail the batch. With stream=true, items are streamed as NDJSON as soon as each completes (use `index` to match them to queries). Each item gets the usual per-request time budget from when it starts running; X-Request-Timeout-Ms (default SEARCH_BATCH_TIMEOUT_MS) caps the whole batch, and items still queued when it passes fail with 504 DEADLINE_EXCEEDED.",
+)
+async def search_batch(
+    body: BatchSearchRequest,
+    stream: bool = Query(False, description="Stream items as NDJSON in completion order"),
+    deadline: Deadline = Depends(batch_deadline),
+):
+    """Batch search: per-item /search semantics, SEARCH_BATCH_CONCURRENCY at a time, input order unless streamed."""
+    if not body.queries:
         return PrettyJSONResponse(
             status_code=400,
-            content={"error": "topic must be 'news' or 'general'", "code": "INVALID_TOPIC"},
+            content={"error": "At least one query required", "code": "MISSING_QUERIES"},
         )
-    if days is not None and days < 1:
+    if len(body.queries) > config.SEARCH_BATCH_MAX_ITEMS:
         return PrettyJSONResponse(
             status_code=400,
-            content={"error": "days must be >= 1", "code": "INVALID_DAYS"},
+            content={
+                "error": f"Maximum {config.SEARCH_BATCH_MAX_ITEMS} queries allowed",
+                "code": "TOO_MANY_QUERIES",
+            },
         )
-    if not config.TAVILY_API_KEY:
-        return PrettyJSONResponse(
-            status_code=502,
-            content={"error": "Tavily API key not configured", "code": "TAVILY_ERROR"},
-        )
-
-    try:
-        flow = run_search(q.strip(), limit=limit, topic=topic or "general", days=days)
-    except ValueError as e:
-        return PrettyJSONResponse(status_code=502, content={"error": redact_message(str(e)), "code": "TAVILY_ERROR"})
-    except Exception as e:
-        logger.warning("Search failed: %s", e)
-        return PrettyJSONResponse(status_code=502, content={"error": redact_message(str(e)), "code": "TAVILY_ERROR"})
 
-    if not flow.results:
-        return PrettyJSONResponse(
-            status_code=404,
-            content={"error": "No results found", "code": "NO_RESULTS"},
+    semaphore = asyncio.Semaphore(config.SEARCH_BATCH_CONCURRENCY)
+    if not stream:
+        items = await asyncio.gather(
+            *(_batch_item(i, item, semaphore, deadline) for i, item in enumerate(body.queries))
         )
+        succeeded = sum(1 for item in items if item.status == 200)
+        return BatchSearchResponse(results=items, succeeded=succeeded, failed=len(items) - succeeded)
 
-    return SearchResponse(
-        query=q.strip(),
-        results=flow.results,
-        total=len(flow.results),
-        reranked=flow.reranked,
-    )
+    async def lines():
+        tasks = [
+            asyncio.ensure_future(_batch_item(i, item, semaphore, deadline))
+            for i, item in enumerate(body.queries)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                yield item.model_dump_json() + "\n"
+        finally:
+            # Client went away: stop the searches that have not finished
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
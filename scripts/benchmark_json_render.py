@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Compare JSON render time and size for Conversation payloads: old pretty output vs compact encoders.
+
+Payloads are GET /conversations/{id} responses (Conversation model, dumped the way
+FastAPI hands them to the response class) with N turns of answer, 5 citations and 5
+results each. Encoders:
+- stdlib-pretty:  json.dumps(indent=2), the previous default
+- stdlib-compact: json.dumps with minimal separators (fallback without orjson)
+- orjson-compact / orjson-pretty: utils.responses.render_json when orjson is installed
+
+Usage: python scripts/benchmark_json_render.py [--turns 1 10 50] [--repeat 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.conversation import Conversation  # noqa: E402
+from utils import responses  # noqa: E402
+
+
+def make_conversation(rng: random.Random, turns: int) -> dict[str, Any]:
+    words = ["market", "inflation", "model", "release", "python", "bank", "earnings", "policy", "agent", "search"]
+    messages = []
+    for _ in range(turns):
+        results = [
+            {
+                "id": uuid.uuid4().hex[:16],
+                "url": f"https://site{rng.randint(0, 300)}.example.com/articles/{rng.randint(0, 10**6)}",
+                "title": " ".join(rng.choice(words).title() for _ in range(rng.randint(5, 10))),
+                "snippet": " ".join(rng.choice(words) for _ in range(45))[:300],
+                "score": round(rng.random(), 4),
+                "rank": rank,
+            }
+            for rank in range(1, 6)
+        ]
+        messages.append({
+            "id": str(uuid.uuid4()),
+            "query": "what happened with " + " ".join(rng.sample(["rates", "ai", "chips", "banks", "oil"], 3)),
+            "answer": "Answer text with a [1] citation. " * rng.randint(10, 30),
+            "citations": [{k: r[k] for k in ("title", "url", "score", "rank")} for r in results],
+            "results": results,
+            "created_at": "2026-01-01T00:00:00Z",
+        })
+    conv = Conversation(
+        id=str(uuid.uuid4()),
+        created_at="2026-01-01T00:00:00Z",
+        message_count=turns,
+        messages=messages,
+    )
+    return conv.model_dump(mode="json")
+
+
+def encoders() -> dict[str, Callable[[Any], bytes]]:
+    out: dict[str, Callable[[Any], bytes]] = {
+        "stdlib-pretty": lambda c: json.dumps(
+            c, ensure_ascii=False, allow_nan=False, indent=2, separators=(", ", ": ")
+        ).encode("utf-8"),
+        "stdlib-compact": lambda c: json.dumps(
+            c, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8"),
+    }
+    if responses.orjson is not None:
+        out["orjson-compact"] = lambda c: responses.render_json(c)
+        out["orjson-pretty"] = lambda c: responses.render_json(c, pretty=True)
+    return out
+
+
+def median_us(fn: Callable[[Any], bytes], content: Any, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(content)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, nargs="+", default=[1, 10, 50], help="Messages per conversation")
+    parser.add_argument("--repeat", type=int, default=200, help="Renders per encoder (median reported)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print a JSON summary")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = []
+    for turns in args.turns:
+        content = make_conversation(rng, turns)
+        baseline = None
+        for name, fn in encoders().items():
+            size = len(fn(content))
+            us = median_us(fn, content, args.repeat)
+            if baseline is None:
+                baseline = (us, size)
+            rows.append({
+                "turns": turns,
+                "encoder": name,
+                "median_us": round(us, 1),
+                "bytes": size,
+                "speedup": round(baseline[0] / us, 2) if us else 0.0,
+                "size_ratio": round(size / baseline[1], 3),
+            })
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    if responses.orjson is None:
+        print("orjson not installed: only stdlib encoders measured")
+    print(f"{'turns':>5}  {'encoder':<15} {'median':>10} {'bytes':>9} {'speedup':>8} {'size':>7}")
+    for r in rows:
+        print(
+            f"{r['turns']:>5}  {r['encoder']:<15} {r['median_us']:>8.1f}us {r['bytes']:>9} "
+            f"{r['speedup']:>7.2f}x {r['size_ratio']:>7.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
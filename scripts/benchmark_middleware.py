@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Measure in-process throughput of /health and /conversations with BaseHTTPMiddleware (before) vs pure ASGI middleware (after).
+
+Both variants run the real app (routers, dependencies, exception handlers); only the
+request-ID and body-limit middleware differ. "before" swaps in the previous
+BaseHTTPMiddleware implementations, kept below for comparison. Requests go through
+httpx's ASGI transport, so no network or server process is involved and the numbers
+isolate per-request framework overhead.
+
+Usage: python scripts/benchmark_middleware.py [--requests 3000] [--concurrency 16]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from main import app  # noqa: E402
+from store import create_conversation  # noqa: E402
+from utils import middleware  # noqa: E402
+
+
+class LegacyBodySizeLimitMiddleware(BaseHTTPMiddleware):
+    """Previous implementation: Content-Length check only."""
+
+    def __init__(self, app, max_bytes: int) -> None:
+        super().__init__(app)
+        self.max_bytes = max_bytes
+
+    async def dispatch(self, request: Request, call_next):
+        content_length = request.headers.get("content-length")
+        if content_length:
+            try:
+                if int(content_length) > self.max_bytes:
+                    return JSONResponse(status_code=413, content=middleware.PAYLOAD_TOO_LARGE_ERROR)
+            except ValueError:
+                pass
+        return await call_next(request)
+
+
+class LegacyRequestIDMiddleware(BaseHTTPMiddleware):
+    """Previous implementation."""
+
+    async def dispatch(self, request: Request, call_next):
+        request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
+        request.state.request_id = request_id
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+LEGACY = {
+    middleware.RequestIDMiddleware: LegacyRequestIDMiddleware,
+    middleware.BodySizeLimitMiddleware: LegacyBodySizeLimitMiddleware,
+}
+CONFIGURED = list(app.user_middleware)
+
+
+def use_middleware(variant: str) -> None:
+    """Rebuild the app's middleware stack with the given variant."""
+    stack = []
+    for m in CONFIGURED:
+        cls = LEGACY.get(m.cls, m.cls) if variant == "before" else m.cls
+        stack.append(Middleware(cls, *m.args, **m.kwargs))
+    app.user_middleware = stack
+    app.middleware_stack = None  # rebuilt on the next request
+
+
+async def throughput(path: str, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(50):  # warm up
+            await client.get(path)
+        remaining = requests
+
+        async def worker() -> None:
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                r = await client.get(path)
+                r.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=3000, help="Requests per endpoint and variant")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=3, help="Alternating rounds (best kept)")
+    parser.add_argument("--json", action="store_true", help="Print a JSON summary")
+    args = parser.parse_args()
+
+    for i in range(20):
+        create_conversation(str(uuid.uuid4()), f"2026-01-01T00:00:{i:02d}Z")
+    paths = ["/health", "/conversations?page_size=20"]
+    best: dict[tuple[str, str], float] = {}
+    for _ in range(args.rounds):
+        for variant in ("before", "after"):
+            use_middleware(variant)
+            for path in paths:
+                rps = asyncio.run(throughput(path, args.requests, args.concurrency))
+                best[(path, variant)] = max(best.get((path, variant), 0.0), rps)
+
+    summary = [
+        {
+            "path": path,
+            "before_rps": round(best[(path, "before")]),
+            "after_rps": round(best[(path, "after")]),
+            "speedup": round(best[(path, "after")] / best[(path, "before")], 2),
+        }
+        for path in paths
+    ]
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(f"{'path':<30} {'before':>10} {'after':>10} {'speedup':>8}")
+    for row in summary:
+        print(f"{row['path']:<30} {row['before_rps']:>8}/s {row['after_rps']:>8}/s {row['speedup']:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
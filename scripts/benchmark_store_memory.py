@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Measure memory per stored conversation message: plain dicts (before) vs compact records (after).
+
+Synthetic turns shaped like add-message output (query, answer, top-5 results and their
+citations) are parsed from JSON, as they would arrive from the API/Tavily, so every
+turn starts with its own string objects. Pages are drawn from a shared pool, so the
+same URLs/titles recur across turns the way popular sources do in practice.
+
+Usage: python scripts/benchmark_store_memory.py [--messages 20000] [--pool 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tracemalloc
+import uuid
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from store.records import MessageRecord  # noqa: E402
+
+
+def make_pool(rng: random.Random, size: int) -> list[dict[str, str]]:
+    words = ["market", "inflation", "model", "release", "python", "bank", "earnings", "policy", "agent", "search"]
+    return [
+        {
+            "url": f"https://site{i % 300}.example.com/articles/{i}/{rng.choice(words)}-{rng.choice(words)}",
+            "title": " ".join(rng.choice(words).title() for _ in range(rng.randint(5, 10))),
+            "snippet": " ".join(rng.choice(words) for _ in range(45))[:300],
+        }
+        for i in range(size)
+    ]
+
+
+def make_turns(rng: random.Random, pool: list[dict[str, str]], count: int) -> list[str]:
+    turns = []
+    for _ in range(count):
+        results = [
+            {
+                "id": uuid.uuid4().hex[:16],
+                "url": page["url"],
+                "title": page["title"],
+                "snippet": page["snippet"],
+                "score": round(rng.random(), 4),
+                "rank": rank,
+            }
+            for rank, page in enumerate(rng.sample(pool, 5), start=1)
+        ]
+        turn = {
+            "id": str(uuid.uuid4()),
+            "query": "what happened with " + " ".join(rng.sample(["rates", "ai", "chips", "banks", "oil"], 3)),
+            "answer": "Answer text " * rng.randint(20, 60),
+            "citations": [{k: r[k] for k in ("title", "url", "score", "rank")} for r in results],
+            "results": results,
+            "created_at": "2026-01-01T00:00:00Z",
+        }
+        turns.append(json.dumps(turn))
+    return turns
+
+
+def retained_bytes(turns: list[str], build: Callable[[dict[str, Any]], Any]) -> int:
+    """Bytes still allocated after converting every turn (temporaries freed)."""
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    stored = [build(json.loads(t)) for t in turns]
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del stored
+    return used
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000, help="Stored messages to simulate")
+    parser.add_argument("--pool", type=int, default=2000, help="Distinct pages results are drawn from")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print a JSON summary")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    turns = make_turns(rng, make_pool(rng, args.pool), args.messages)
+    before = retained_bytes(turns, lambda d: d)
+    after = retained_bytes(turns, MessageRecord.from_dict)
+    summary = {
+        "messages": args.messages,
+        "pool": args.pool,
+        "dict_bytes_per_message": round(before / args.messages),
+        "record_bytes_per_message": round(after / args.messages),
+        "reduction": round(1 - after / before, 3) if before else 0.0,
+    }
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(f"messages: {summary['messages']}  (pages in pool: {summary['pool']})")
+    print(f"plain dicts:     {summary['dict_bytes_per_message']:>7} bytes/message")
+    print(f"compact records: {summary['record_bytes_per_message']:>7} bytes/message")
+    print(f"reduction:       {summary['reduction']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,13 @@
 # Service layer: Tavily (retrieve), Cohere (rerank), reranker (merge), no business logic in routers
-from services.tavily import tavily_search
-from services.cohere_service import cohere_rerank
+from services.tavily import tavily_search, tavily_search_async
+from services.cohere_service import cohere_rerank, cohere_rerank_async
 from services.reranker import merge_and_rank, tavily_only_results
 
-__all__ = ["tavily_search", "cohere_rerank", "merge_and_rank", "tavily_only_results"]
+__all__ = [
+    "tavily_search",
+    "tavily_search_async",
+    "cohere_rerank",
+    "cohere_rerank_async",
+    "merge_and_rank",
+    "tavily_only_results",
+]
@@ -0,0 +1,39 @@
+"""Answer cache for GET /answer.
+
+Keyed by normalized query, topic, days, Gemini model and a fingerprint of the cited
+sources (URL + snippet of each), so a cached answer is only reused when it would be
+synthesized from the same sources. Values are the answer text; citations are rebuilt
+from the current results.
+"""
+import hashlib
+
+import config
+from models.search import SearchResult
+from utils.cache import TTLCache, normalize_query
+
+answer_cache = TTLCache(
+    "answers",
+    max_entries=config.ANSWER_CACHE_MAX_ENTRIES,
+    default_ttl=config.ANSWER_CACHE_TTL_SEC,
+)
+
+
+def sources_fingerprint(sources: list[SearchResult]) -> str:
+    """Order-sensitive hash of the sources' URLs and snippets."""
+    h = hashlib.sha256()
+    for r in sources:
+        h.update(r.url.encode())
+        h.update(b"\0")
+        h.update(r.snippet.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def answer_cache_key(
+    query: str,
+    topic: str,
+    days: int | None,
+    model: str,
+    sources: list[SearchResult],
+) -> tuple:
+    return (normalize_query(query), topic, days, model, sources_fingerprint(sources))
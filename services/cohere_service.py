@@ -1,9 +1,49 @@
-"""Cohere Rerank API client. Returns list of (index, relevance_score). Retries on 429/503/500."""
+"""Cohere Rerank API client. Returns list of (index, relevance_score). Retries on 429/503/500.
+
+cohere_rerank_cached(_async) keeps a per-document score cache keyed by
+(model, normalized query, document hash) and only sends unseen documents to Cohere.
+Relevance scores are per query-document pair, so cached and fresh scores are comparable.
+"""
+import hashlib
+
 import httpx
 
-from utils.retry import retry_http
+import config
+from services.http_clients import get_async_client, get_client
+from utils.cache import TTLCache, normalize_query
+from utils.circuit_breaker import breakers
+from utils.deadline import Deadline, expires_at, raise_if_expired, stage_timeout
+from utils.retry import retry_http, retry_http_async
 
 COHERE_RERANK_URL = "https://api.cohere.com/v2/rerank"
+TIMEOUT_SEC = 30.0
+DEFAULT_MODEL = "rerank-v3.5"
+
+score_cache = TTLCache(
+    "cohere_scores",
+    max_entries=config.COHERE_SCORE_CACHE_MAX_ENTRIES,
+    default_ttl=config.COHERE_SCORE_CACHE_TTL_SEC,
+)
+
+
+def _rerank_payload(query: str, documents: list[str], model: str, top_n: int | None) -> dict:
+    top_n = top_n if top_n is not None else min(len(documents), 20)
+    # Cross-encoder: scores query-document relevance directly (not cosine on embeddings)
+    return {
+        "model": model,
+        "query": query,
+        "documents": documents,
+        "top_n": top_n,
+    }
+
+
+def _headers(api_key: str) -> dict:
+    return {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+
+
+def _parse_scores(data: dict) -> list[tuple[int, float]]:
+    results = data.get("results", [])
+    return [(r["index"], r["relevance_score"]) for r in results]
 
 
 def cohere_rerank(
@@ -11,8 +51,10 @@ def cohere_rerank(
     query: str,
     documents: list[str],
     *,
-    model: str = "rerank-v3.5",
+    model: str = DEFAULT_MODEL,
     top_n: int | None = None,
+    client: httpx.Client | None = None,
+    deadline: Deadline | None = None,
 ) -> list[tuple[int, float]]:
     """
     Rerank documents by relevance. Returns list of (original_index, relevance_score).
@@ -21,24 +63,124 @@ def cohere_rerank(
     if not documents:
         return []
 
-    top_n = top_n if top_n is not None else min(len(documents), 20)
-    # Cross-encoder: scores query-document relevance directly (not cosine on embeddings)
-    payload = {
-        "model": model,
-        "query": query,
-        "documents": documents,
-        "top_n": top_n,
-    }
+    payload = _rerank_payload(query, documents, model, top_n)
+    client = client or get_client("cohere")
+
+    def do_request():
+        timeout = stage_timeout(deadline, TIMEOUT_SEC)
+        try:
+            resp = client.post(COHERE_RERANK_URL, headers=_headers(api_key), json=payload, timeout=timeout)
+        except httpx.TimeoutException as e:
+            raise_if_expired(deadline, e)
+            raise
+        resp.raise_for_status()
+        return resp.json()
+    breaker = breakers["cohere"]
+    return _parse_scores(retry_http(lambda: breaker.call(do_request), deadline=expires_at(deadline)))
+
+
+async def cohere_rerank_async(
+    api_key: str,
+    query: str,
+    documents: list[str],
+    *,
+    model: str = DEFAULT_MODEL,
+    top_n: int | None = None,
+    client: httpx.AsyncClient | None = None,
+    deadline: Deadline | None = None,
+) -> list[tuple[int, float]]:
+    """Async cohere_rerank. Raises httpx.HTTPStatusError on failure."""
+    if not documents:
+        return []
+
+    payload = _rerank_payload(query, documents, model, top_n)
+    client = client or get_async_client("cohere")
+
+    async def do_request():
+        timeout = stage_timeout(deadline, TIMEOUT_SEC)
+        try:
+            resp = await client.post(COHERE_RERANK_URL, headers=_headers(api_key), json=payload, timeout=timeout)
+        except httpx.TimeoutException as e:
+            raise_if_expired(deadline, e)
+            raise
+        resp.raise_for_status()
+        return resp.json()
+    breaker = breakers["cohere"]
+    return _parse_scores(
+        await retry_http_async(lambda: breaker.call_async(do_request), deadline=expires_at(deadline))
+    )
+
+
+def _score_keys(model: str, query: str, documents: list[str]) -> list[tuple[str, str, str]]:
+    q = normalize_query(query)
+    return [(model, q, hashlib.sha256(d.encode()).hexdigest()) for d in documents]
+
+
+def _lookup_cached(keys: list[tuple[str, str, str]]) -> tuple[dict[int, float], list[int]]:
+    """Split document indexes into cached scores and indexes that still need Cohere."""
+    scores: dict[int, float] = {}
+    missing: list[int] = []
+    for i, key in enumerate(keys):
+        score = score_cache.get(key)
+        if score is None:
+            missing.append(i)
+        else:
+            scores[i] = score
+    return scores, missing
+
+
+def _merge_fresh(
+    scores: dict[int, float],
+    missing: list[int],
+    fresh: list[tuple[int, float]],
+    keys: list[tuple[str, str, str]],
+) -> list[tuple[int, float]]:
+    """Map fresh (subset index, score) back to original indexes, cache them, return all in score order."""
+    for sub_idx, score in fresh:
+        if sub_idx >= len(missing):
+            continue
+        orig_idx = missing[sub_idx]
+        scores[orig_idx] = score
+        score_cache.set(keys[orig_idx], score)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
 
-    with httpx.Client(timeout=30.0) as client:
-        def do_request():
-            resp = client.post(
-                COHERE_RERANK_URL,
-                headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
-                json=payload,
-            )
-            resp.raise_for_status()
-            return resp.json()
-        data = retry_http(do_request)
-        results = data.get("results", [])
-        return [(r["index"], r["relevance_score"]) for r in results]
+def cohere_rerank_cached(
+    api_key: str,
+    query: str,
+    documents: list[str],
+    *,
+    model: str = DEFAULT_MODEL,
+    client: httpx.Client | None = None,
+    deadline: Deadline | None = None,
+) -> list[tuple[int, float]]:
+    """
+    Score every document, sending only those without a cached score to Cohere.
+    Returns [(original_index, relevance_score), ...] for all documents, best first.
+    """
+    keys = _score_keys(model, query, documents)
+    scores, missing = _lookup_cached(keys)
+    fresh: list[tuple[int, float]] = []
+    if missing:
+        subset = [documents[i] for i in missing]
+        fresh = cohere_rerank(api_key, query, subset, model=model, top_n=len(subset), client=client, deadline=deadline)
+    return _merge_fresh(scores, missing, fresh, keys)
+
+
+async def cohere_rerank_cached_async(
+    api_key: str,
+    query: str,
+    documents: list[str],
+    *,
+    model: str = DEFAULT_MODEL,
+    client: httpx.AsyncClient | None = None,
+    deadline: Deadline | None = None,
+) -> list[tuple[int, float]]:
+    """Async cohere_rerank_cached."""
+    keys = _score_keys(model, query, documents)
+    scores, missing = _lookup_cached(keys)
+    fresh: list[tuple[int, float]] = []
+    if missing:
+        subset = [documents[i] for i in missing]
+        fresh = await cohere_rerank_async(api_key, query, subset, model=model, top_n=len(subset), client=client, deadline=deadline)
+    return _merge_fresh(scores, missing, fresh, keys)
@@ -0,0 +1,90 @@
+"""Collapse duplicate Tavily results before rerank and synthesis.
+
+Two passes over the Tavily list:
+- Exact: URLs equal after canonical_url (tracking params, scheme, host case, www.,
+  default ports, fragments and trailing slashes ignored).
+- Near: SimHash of title + content word shingles within DEDUP_SIMHASH_MAX_DISTANCE
+  bits (syndicated copies, mirrors).
+Each group keeps its highest-scoring Tavily result, at the group's first position.
+"""
+import hashlib
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+
+import config
+
+_TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "ref_url", "cmpid", "spm", "_ga", "_hsenc", "_hsmi", "mkt_tok",
+})
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_WORD_RE = re.compile(r"\w+")
+_SHINGLE = 3
+_MIN_TOKENS = 8  # shorter texts are too small to fingerprint reliably; URL pass only
+_BITS = np.arange(64, dtype=np.uint64)
+
+
+def canonical_url(url: str) -> str:
+    """Comparison form of a URL; not meant to be fetched."""
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url.strip()
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower().removeprefix("www.")
+    if port and port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    )
+    # http and https copies of a page are the same page
+    if scheme == "http":
+        scheme = "https"
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def simhash(text: str) -> int | None:
+    """64-bit SimHash over word shingles; None when the text is too short."""
+    tokens = _WORD_RE.findall(text.casefold())
+    if len(tokens) < _MIN_TOKENS:
+        return None
+    shingles = {" ".join(tokens[i:i + _SHINGLE]) for i in range(len(tokens) - _SHINGLE + 1)}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    bits = (hashes[:, None] >> _BITS) & np.uint64(1)
+    votes = 2 * bits.sum(axis=0, dtype=np.int64) - len(shingles)
+    return int(((votes > 0).astype(np.uint64) << _BITS).sum())
+
+
+def dedup_results(tavily_results: list[dict]) -> tuple[list[dict], int]:
+    """Return (deduplicated results in Tavily order, number of results collapsed)."""
+    if not config.DEDUP_ENABLED or len(tavily_results) < 2:
+        return tavily_results, 0
+    max_distance = config.DEDUP_SIMHASH_MAX_DISTANCE
+    groups: list[list[dict]] = []
+    by_url: dict[str, int] = {}
+    fingerprints: list[tuple[int, int]] = []  # (simhash, group index)
+    for r in tavily_results:
+        key = canonical_url(r.get("url", ""))
+        group = by_url.get(key)
+        fp = simhash(f"{r.get('title', '')}\n{r.get('content', '')}")
+        if group is None and fp is not None:
+            group = next((g for other, g in fingerprints if (fp ^ other).bit_count() <= max_distance), None)
+        if group is None:
+            group = len(groups)
+            groups.append([])
+        groups[group].append(r)
+        by_url.setdefault(key, group)
+        if fp is not None:
+            fingerprints.append((fp, group))
+    kept = [max(g, key=lambda r: r.get("score") or 0.0) for g in groups]
+    return kept, len(tavily_results) - len(kept)
@@ -1,50 +1,55 @@
-"""Gemini API client for answer synthesis. Retries on 429/503/500."""
+"""Gemini API client for answer synthesis. Retries on 429/503/500.
+
+gemini_stream_async streams text deltas from streamGenerateContent (SSE); retries
+apply only until the stream is open.
+"""
+import json
 import logging
+from typing import AsyncIterator
 
 import httpx
 
 import config
-from utils.retry import retry_http
+from services.http_clients import get_async_client, get_client
+from utils.circuit_breaker import breakers
+from utils.deadline import Deadline, expires_at, raise_if_expired, stage_timeout
+from utils.retry import retry_http, retry_http_async
 
 logger = logging.getLogger(__name__)
 
 MODEL = config.GEMINI_MODEL  # for response metadata and experiments
+TIMEOUT_SEC = 60.0
 
 
-def _gemini_url() -> str:
-    return f"https://generativelanguage.googleapis.com/v1beta/models/{config.GEMINI_MODEL}:generateContent"
+def _gemini_url(method: str = "generateContent") -> str:
+    return f"https://generativelanguage.googleapis.com/v1beta/models/{config.GEMINI_MODEL}:{method}"
 
 
-def gemini_generate(api_key: str, prompt: str, *, max_tokens: int = 512) -> str:
-    """
-    Call Gemini generateContent. Returns the generated text.
-    Raises httpx.HTTPStatusError on failure.
-    """
+def _request_body(prompt: str, max_tokens: int) -> dict:
     prompt = (prompt or "").strip()
     if not prompt:
         raise ValueError("Gemini prompt must not be empty")
-
-    url = f"{_gemini_url()}?key={api_key}"
-    body = {
+    return {
         "contents": [{"role": "user", "parts": [{"text": prompt}]}],
         "generationConfig": {
             "maxOutputTokens": max_tokens,
             "temperature": 0.3,
         },
     }
-    with httpx.Client(timeout=60.0) as client:
-        def do_request():
-            resp = client.post(url, json=body)
-            if not resp.is_success:
-                try:
-                    err_body = resp.text
-                    if err_body:
-                        logger.warning("Gemini API error response: %s", err_body[:500])
-                except Exception:
-                    pass
-            resp.raise_for_status()
-            return resp.json()
-        data = retry_http(do_request)
+
+
+def _log_error_body(resp: httpx.Response) -> None:
+    if resp.is_success:
+        return
+    try:
+        err_body = resp.text
+        if err_body:
+            logger.warning("Gemini API error response: %s", err_body[:500])
+    except Exception:
+        pass
+
+
+def _parse_text(data: dict) -> str:
     # Parse generateContent response: candidates[0].content.parts[0].text
     candidates = data.get("candidates") or []
     if not candidates:
@@ -53,3 +58,117 @@ def gemini_generate(api_key: str, prompt: str, *, max_tokens: int = 512) -> str:
     if not parts:
         raise ValueError("Gemini returned no content")
     return parts[0].get("text", "").strip()
+
+
+def gemini_generate(
+    api_key: str,
+    prompt: str,
+    *,
+    max_tokens: int = 512,
+    client: httpx.Client | None = None,
+    deadline: Deadline | None = None,
+) -> str:
+    """
+    Call Gemini generateContent. Returns the generated text.
+    Raises httpx.HTTPStatusError on failure.
+    """
+    body = _request_body(prompt, max_tokens)
+    url = f"{_gemini_url()}?key={api_key}"
+    client = client or get_client("gemini")
+
+    def do_request():
+        try:
+            resp = client.post(url, json=body, timeout=stage_timeout(deadline, TIMEOUT_SEC))
+        except httpx.TimeoutException as e:
+            raise_if_expired(deadline, e)
+            raise
+        _log_error_body(resp)
+        resp.raise_for_status()
+        return resp.json()
+    breaker = breakers["gemini"]
+    return _parse_text(retry_http(lambda: breaker.call(do_request), deadline=expires_at(deadline)))
+
+
+async def gemini_generate_async(
+    api_key: str,
+    prompt: str,
+    *,
+    max_tokens: int = 512,
+    client: httpx.AsyncClient | None = None,
+    deadline: Deadline | None = None,
+) -> str:
+    """Async gemini_generate. Raises httpx.HTTPStatusError on failure."""
+    body = _request_body(prompt, max_tokens)
+    url = f"{_gemini_url()}?key={api_key}"
+    client = client or get_async_client("gemini")
+
+    async def do_request():
+        try:
+            resp = await client.post(url, json=body, timeout=stage_timeout(deadline, TIMEOUT_SEC))
+        except httpx.TimeoutException as e:
+            raise_if_expired(deadline, e)
+            raise
+        _log_error_body(resp)
+        resp.raise_for_status()
+        return resp.json()
+    breaker = breakers["gemini"]
+    return _parse_text(
+        await retry_http_async(lambda: breaker.call_async(do_request), deadline=expires_at(deadline))
+    )
+
+
+def _chunk_text(data: dict) -> str:
+    """Text delta of one streamGenerateContent chunk ("" for chunks without text)."""
+    candidates = data.get("candidates") or []
+    if not candidates:
+        return ""
+    parts = candidates[0].get("content", {}).get("parts") or []
+    return "".join(p.get("text", "") for p in parts)
+
+
+async def gemini_stream_async(
+    api_key: str,
+    prompt: str,
+    *,
+    max_tokens: int = 512,
+    client: httpx.AsyncClient | None = None,
+    deadline: Deadline | None = None,
+) -> AsyncIterator[str]:
+    """
+    Call Gemini streamGenerateContent and yield text deltas as they arrive.
+    Raises httpx.HTTPStatusError if the stream cannot be opened. Closing the
+    generator (e.g. client disconnect) closes the upstream connection.
+    """
+    body = _request_body(prompt, max_tokens)
+    url = f"{_gemini_url('streamGenerateContent')}?alt=sse&key={api_key}"
+    client = client or get_async_client("gemini")
+
+    async def open_stream():
+        request = client.build_request("POST", url, json=body, timeout=stage_timeout(deadline, TIMEOUT_SEC))
+        try:
+            resp = await client.send(request, stream=True)
+        except httpx.TimeoutException as e:
+            raise_if_expired(deadline, e)
+            raise
+        if not resp.is_success:
+            await resp.aread()
+            await resp.aclose()
+            _log_error_body(resp)
+            resp.raise_for_status()
+        return resp
+
+    # The breaker judges opening the stream (status, time to first byte), not its full duration
+    breaker = breakers["gemini"]
+    resp = await retry_http_async(lambda: breaker.call_async(open_stream), deadline=expires_at(deadline))
+    try:
+        async for line in resp.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            payload = line[len("data:"):].strip()
+            if not payload:
+                continue
+            text = _chunk_text(json.loads(payload))
+            if text:
+                yield text
+    finally:
+        await resp.aclose()
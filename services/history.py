@@ -0,0 +1,132 @@
+"""Conversation history for Gemini prompts: recent turns verbatim, older ones as a rolling summary.
+
+- The last HISTORY_VERBATIM_TURNS turns go into the prompt as Q/A pairs.
+- Older turns are folded into conv["summary"] in the background after a turn is
+  stored. Only the turns that aged out since the last compaction are sent to Gemini,
+  along with the current summary, so the summary is updated rather than regenerated.
+- Turns that aged out but are not folded in yet (compaction pending or failed) are
+  still included verbatim. The whole history is capped at HISTORY_TOKEN_BUDGET
+  estimated tokens, dropping the oldest turns first.
+"""
+import asyncio
+import logging
+from typing import NamedTuple, Sequence
+
+import config
+from services.gemini_service import gemini_generate_async
+from store import get_conversation, set_conversation_summary
+from store.records import MessageRecord
+
+logger = logging.getLogger(__name__)
+
+# Rough size for budgeting: English text averages about 4 characters per token
+CHARS_PER_TOKEN = 4
+
+SUMMARY_INSTRUCTION = (
+    "You maintain a running summary of a conversation between a user and an assistant. "
+    "Update the summary with the new turns below. Keep facts, names, numbers, conclusions and open "
+    "questions the user may refer back to; drop pleasantries and source citations. "
+    "Write plain prose, at most {words} words. Return only the updated summary."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of text (no tokenizer call)."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+class PromptHistory(NamedTuple):
+    """What the prompt carries about earlier turns: a summary and the turns kept verbatim."""
+
+    summary: str
+    turns: list[tuple[str, str]]
+
+
+def _summarized_index(messages: Sequence[MessageRecord], summary_through: str | None) -> int:
+    """Index of the newest message folded into the summary; -1 if none are left in the log."""
+    if summary_through is None:
+        return -1
+    for i in range(len(messages) - 1, -1, -1):
+        if messages[i].id == summary_through:
+            return i
+    # Not found: already dropped by the message cap, so every remaining message is newer
+    return -1
+
+
+def prompt_history(conv: dict) -> PromptHistory:
+    """Summary plus the unsummarized turns, newest kept first, within HISTORY_TOKEN_BUDGET."""
+    messages = conv.get("messages", [])
+    summary = conv.get("summary", "")
+    start = _summarized_index(messages, conv.get("summary_through")) + 1
+    budget = config.HISTORY_TOKEN_BUDGET - estimate_tokens(summary)
+    turns: list[tuple[str, str]] = []
+    for m in reversed(messages[start:]):
+        cost = estimate_tokens(m.query) + estimate_tokens(m.answer)
+        if cost > budget:
+            if not turns and budget > estimate_tokens(m.query):
+                # Always keep the latest turn: trim its answer to what fits
+                room = (budget - estimate_tokens(m.query)) * CHARS_PER_TOKEN
+                turns.append((m.query, m.answer[:room]))
+            break
+        turns.append((m.query, m.answer))
+        budget -= cost
+    turns.reverse()
+    return PromptHistory(summary, turns)
+
+
+def _pending_turns(conv: dict) -> list[MessageRecord]:
+    """Turns older than the verbatim window that are not in the summary yet."""
+    messages = conv.get("messages", [])
+    start = _summarized_index(messages, conv.get("summary_through")) + 1
+    end = len(messages) - config.HISTORY_VERBATIM_TURNS
+    return list(messages[start:end]) if end > start else []
+
+
+def _summary_prompt(summary: str, turns: list[MessageRecord]) -> str:
+    parts = [SUMMARY_INSTRUCTION.format(words=config.HISTORY_SUMMARY_MAX_WORDS), ""]
+    parts.append("Current summary:")
+    parts.append(summary or "(none yet)")
+    parts.append("")
+    parts.append("New turns:")
+    for m in turns:
+        parts.append(f"Q: {m.query}")
+        parts.append(f"A: {m.answer}")
+        parts.append("")
+    return "\n".join(parts).strip()
+
+
+async def compact_history(conversation_id: str) -> bool:
+    """Fold aged-out turns into the conversation's summary. Returns True if the summary changed."""
+    # Store calls may hit disk (sqlite backend): keep them off the event loop
+    conv = await asyncio.to_thread(get_conversation, conversation_id)
+    if conv is None or not config.GEMINI_API_KEY:
+        return False
+    pending = _pending_turns(conv)
+    if len(pending) < config.HISTORY_COMPACT_MIN_TURNS:
+        return False
+    summary = await gemini_generate_async(
+        config.GEMINI_API_KEY,
+        _summary_prompt(conv.get("summary", ""), pending),
+        max_tokens=config.HISTORY_SUMMARY_MAX_WORDS * 2,
+    )
+    return await asyncio.to_thread(set_conversation_summary, conversation_id, summary.strip(), pending[-1].id)
+
+
+_compacting: dict[str, asyncio.Task] = {}
+
+
+def schedule_compaction(conversation_id: str) -> None:
+    """Run compact_history in the background; at most one per conversation at a time."""
+    if not config.HISTORY_COMPACTION_ENABLED or conversation_id in _compacting:
+        return
+
+    async def run() -> None:
+        try:
+            await compact_history(conversation_id)
+        except Exception as e:
+            # Not fatal: the turns stay verbatim (within budget) and are retried after the next turn
+            logger.warning("History compaction failed: %s", e)
+        finally:
+            _compacting.pop(conversation_id, None)
+
+    _compacting[conversation_id] = asyncio.create_task(run())
@@ -0,0 +1,117 @@
+"""Shared, pooled HTTP clients for upstream providers (Tavily, Cohere, Gemini).
+
+One httpx.Client (sync services, scripts) and one httpx.AsyncClient (async
+pipeline used by the API) per provider keep TCP/TLS connections alive across
+requests. Opened in main.lifespan and closed on shutdown; scripts that never run
+the app get a client lazily on first use. Tests can inject a client (e.g. one
+built on httpx.MockTransport) with set_client() / set_async_client().
+"""
+import logging
+import threading
+
+import httpx
+
+import config
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("tavily", "cohere", "gemini")
+
+_clients: dict[str, httpx.Client] = {}
+_async_clients: dict[str, httpx.AsyncClient] = {}
+_lock = threading.Lock()
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (pip install httpx[http2])."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _client_kwargs() -> dict:
+    """Pool limits, keep-alive and HTTP/2 settings shared by every provider client."""
+    http2 = config.HTTP_HTTP2
+    if http2 and not _http2_available():
+        logger.warning("HTTP_HTTP2 is set but the h2 package is not installed; using HTTP/1.1")
+        http2 = False
+    return {
+        "limits": httpx.Limits(
+            max_connections=config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "http2": http2,
+        "timeout": httpx.Timeout(30.0, connect=config.HTTP_CONNECT_TIMEOUT),
+    }
+
+
+def open_clients() -> None:
+    """Create pooled sync and async clients for every provider that does not have them yet."""
+    with _lock:
+        for provider in PROVIDERS:
+            if provider not in _clients:
+                _clients[provider] = httpx.Client(**_client_kwargs())
+            if provider not in _async_clients:
+                _async_clients[provider] = httpx.AsyncClient(**_client_kwargs())
+
+
+async def close_clients() -> None:
+    """Close and drop all provider clients (called on app shutdown)."""
+    with _lock:
+        clients = list(_clients.values())
+        async_clients = list(_async_clients.values())
+        _clients.clear()
+        _async_clients.clear()
+    for client in clients:
+        client.close()
+    for async_client in async_clients:
+        await async_client.aclose()
+
+
+def get_client(provider: str) -> httpx.Client:
+    """Return the shared client for provider, creating it lazily if needed."""
+    client = _clients.get(provider)
+    if client is not None:
+        return client
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown provider: {provider}")
+    with _lock:
+        client = _clients.get(provider)
+        if client is None:
+            client = httpx.Client(**_client_kwargs())
+            _clients[provider] = client
+        return client
+
+
+def set_client(provider: str, client: httpx.Client) -> None:
+    """Replace the client for provider (e.g. a client with a mock transport in tests)."""
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown provider: {provider}")
+    with _lock:
+        _clients[provider] = client
+
+
+def get_async_client(provider: str) -> httpx.AsyncClient:
+    """Return the shared async client for provider, creating it lazily if needed."""
+    client = _async_clients.get(provider)
+    if client is not None:
+        return client
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown provider: {provider}")
+    with _lock:
+        client = _async_clients.get(provider)
+        if client is None:
+            client = httpx.AsyncClient(**_client_kwargs())
+            _async_clients[provider] = client
+        return client
+
+
+def set_async_client(provider: str, client: httpx.AsyncClient) -> None:
+    """Replace the async client for provider (e.g. a client with a mock transport in tests)."""
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown provider: {provider}")
+    with _lock:
+        _async_clients[provider] = client
@@ -1,13 +1,84 @@
-"""Merge Tavily results + Cohere scores into ranked SearchResult list."""
+"""Merge Tavily results + Cohere scores into ranked SearchResult list.
+
+bm25f_scores is the local lexical ranker: a Cohere fallback and an optional
+pre-filter that trims the candidates sent to Cohere.
+"""
 import hashlib
+import re
+from itertools import chain, repeat
+
+import numpy as np
+
+import config
 from models.search import SearchResult
 
+_TOKEN_RE = re.compile(r"\w+")
+# Every non-word character (\W) in the BMP becomes a space: translate + split then tokenizes
+# exactly like _TOKEN_RE.findall, several times faster than the regex scan
+_NON_WORD = {c: " " for c in range(0x10000) if not (chr(c).isalnum() or c == ord("_"))}
+
 
 def _url_id(url: str) -> str:
     """Stable short id for a URL (first 16 chars of SHA256)."""
     return hashlib.sha256(url.encode()).hexdigest()[:16]
 
 
+def _tokens(text: str) -> list[str]:
+    folded = text.casefold()
+    if folded.isascii() or max(folded) <= "\uffff":
+        return folded.translate(_NON_WORD).split()
+    return _TOKEN_RE.findall(folded)  # characters past the BMP (e.g. emoji) are not in the table
+
+
+def _term_frequencies(texts: list[str], column: dict[str, int]) -> tuple[np.ndarray, np.ndarray]:
+    """(docs x terms counts of the query terms, token count per doc), counted with one bincount."""
+    token_lists = [_tokens(t) for t in texts]
+    lengths = np.fromiter(map(len, token_lists), dtype=np.intp, count=len(texts))
+    # Column of each token (-1 for non-query terms), in document order
+    ids = np.fromiter(
+        map(column.get, chain.from_iterable(token_lists), repeat(-1)), dtype=np.intp, count=int(lengths.sum())
+    )
+    docs = np.repeat(np.arange(len(texts)), lengths)
+    hit = ids >= 0
+    n_terms = len(column)
+    tf = np.bincount(docs[hit] * n_terms + ids[hit], minlength=len(texts) * n_terms)
+    return tf.reshape(len(texts), n_terms).astype(float), lengths
+
+
+def bm25f_scores(query: str, tavily_results: list[dict]) -> list[tuple[int, float]]:
+    """
+    Score Tavily results against query with BM25F over title and content.
+    Returns [(original_index, score), ...] best-first, scores scaled to 0.0–1.0
+    (same shape as Cohere scores, so merge_and_rank applies unchanged).
+    Ties keep Tavily order.
+    """
+    n = len(tavily_results)
+    terms = list(dict.fromkeys(_tokens(query)))
+    if n == 0 or not terms:
+        return [(i, 0.0) for i in range(n)]
+    column = {t: j for j, t in enumerate(terms)}
+
+    # Per field: query-term frequencies (docs x terms), length-normalized, then weighted and summed
+    weighted_tf = np.zeros((n, len(terms)))
+    seen = np.zeros((n, len(terms)), dtype=bool)
+    b = config.BM25_B
+    for field, weight in (("title", config.BM25_TITLE_WEIGHT), ("content", config.BM25_CONTENT_WEIGHT)):
+        tf, lengths = _term_frequencies([r.get(field) or "" for r in tavily_results], column)
+        avg_len = lengths.mean() or 1.0
+        weighted_tf += weight * tf / (1 - b + b * lengths / avg_len)[:, None]
+        seen |= tf > 0
+
+    df = seen.sum(axis=0)
+    idf = np.log1p((n - df + 0.5) / (df + 0.5))
+    k1 = config.BM25_K1
+    scores = (idf * weighted_tf / (k1 + weighted_tf)).sum(axis=1)
+    top = scores.max()
+    if top > 0:
+        scores = scores / top
+    order = np.argsort(-scores, kind="stable")
+    return [(int(i), float(scores[i])) for i in order]
+
+
 def tavily_only_results(tavily_results: list[dict]) -> list[SearchResult]:
     """Build SearchResult list from Tavily only (no Cohere)."""
     out: list[SearchResult] = []
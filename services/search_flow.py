@@ -1,21 +1,104 @@
-"""Shared search+rerank flow used by /search and /answer."""
+"""Shared search+rerank flow used by /search and /answer.
+
+Tavily results are deduplicated first (services.dedup: canonical URLs + SimHash near-duplicates)
+so copies are neither reranked nor sent to Gemini. Ranking: Cohere when available; otherwise the local BM25F ranker (LOCAL_RERANK_ENABLED),
+which can also pre-filter the 20 Tavily results to the top RERANK_PREFILTER_TOP_N before
+they are sent to Cohere.
+
+run_search_async is the API path; run_search is the same flow for sync callers (scripts).
+On the async path, identical concurrent searches and Gemini prompts are coalesced
+(single-flight) so a burst of the same query makes one set of upstream calls.
+"""
+import hashlib
 import logging
 from typing import NamedTuple
 
 import config
 from models.search import SearchResult
-from services.tavily import tavily_search
-from services.cohere_service import cohere_rerank
-from services.reranker import merge_and_rank, tavily_only_results
+from services.tavily import tavily_search, tavily_search_async
+from services.cohere_service import cohere_rerank_cached, cohere_rerank_cached_async
+from services.gemini_service import gemini_generate_async
+from services.dedup import dedup_results
+from services.reranker import bm25f_scores, merge_and_rank, tavily_only_results
+from utils.cache import normalize_query
+from utils.circuit_breaker import CircuitOpenError
+from utils.deadline import Deadline
+from utils.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+search_flight = SingleFlight("search")
+generate_flight = SingleFlight("gemini")
+
 
 class SearchFlowResult(NamedTuple):
-    """Result of run_search: ranked results and whether Cohere rerank was applied."""
+    """Result of run_search: ranked results, whether Cohere rerank was applied, the ranker used
+    and how many duplicate Tavily results were collapsed."""
 
     results: list[SearchResult]
     reranked: bool
+    ranker: str = "cohere"
+    collapsed: int = 0
+
+
+def _tavily_query(query: str, search_query: str | None) -> str:
+    if not config.TAVILY_API_KEY:
+        raise ValueError("TAVILY_API_KEY not configured")
+    return (search_query or query).strip()
+
+
+def _documents(results_list: list[dict]) -> list[str]:
+    # Concatenate title + content for Cohere (rerank uses current query only)
+    return [f"{r.get('title', '')}\n{r.get('content', '')}" for r in results_list]
+
+
+def _rerank_deadline(deadline: Deadline | None, reserve_sec: float) -> tuple[Deadline | None, bool]:
+    """Deadline for the optional Cohere stage, and whether there is enough budget to run it."""
+    if deadline is None:
+        return None, True
+    stage = deadline.reserve(reserve_sec)
+    return stage, stage.remaining() >= config.COHERE_MIN_BUDGET_MS / 1000
+
+
+class _RerankPlan(NamedTuple):
+    """What to send to Cohere: candidate indices into the Tavily results and their documents."""
+
+    candidates: list[int]
+    documents: list[str]
+    local_scores: list[tuple[int, float]] | None
+
+
+def _plan_rerank(query: str, results_list: list[dict], limit: int) -> _RerankPlan:
+    """Pre-filter to the local top N (never fewer than limit) when enabled; else send everything."""
+    documents = _documents(results_list)
+    top_n = config.RERANK_PREFILTER_TOP_N
+    if not config.LOCAL_RERANK_ENABLED or top_n <= 0 or len(results_list) <= max(top_n, limit):
+        return _RerankPlan(list(range(len(results_list))), documents, None)
+    local_scores = bm25f_scores(query, results_list)
+    candidates = [idx for idx, _ in local_scores[: max(top_n, limit)]]
+    return _RerankPlan(candidates, [documents[i] for i in candidates], local_scores)
+
+
+def _finish(
+    query: str,
+    results_list: list[dict],
+    plan: _RerankPlan,
+    scores: list[tuple[int, float]] | None,
+    limit: int,
+    collapsed: int,
+) -> SearchFlowResult:
+    """Rank by Cohere scores when available, else by local BM25F scores, else keep Tavily order."""
+    if scores is not None:
+        # Cohere indexes into the candidates; map back to Tavily positions
+        scores = [(plan.candidates[i], s) for i, s in scores if i < len(plan.candidates)]
+        ranked = merge_and_rank(results_list, scores)
+        return SearchFlowResult(results=ranked[:limit], reranked=True, ranker="cohere", collapsed=collapsed)
+    if config.LOCAL_RERANK_ENABLED:
+        local_scores = plan.local_scores or bm25f_scores(query, results_list)
+        ranked = merge_and_rank(results_list, local_scores)
+        return SearchFlowResult(results=ranked[:limit], reranked=False, ranker="local", collapsed=collapsed)
+    ranked = tavily_only_results(results_list)
+    return SearchFlowResult(results=ranked[:limit], reranked=False, ranker="none", collapsed=collapsed)
 
 
 def run_search(
@@ -25,35 +108,116 @@ def run_search(
     days: int | None = None,
     *,
     search_query: str | None = None,
+    deadline: Deadline | None = None,
+    reserve_sec: float = 0.0,
 ) -> SearchFlowResult:
     """
     Run Tavily search + Cohere rerank. Returns ranked SearchResult list.
-    Raises on Tavily failure. Degrades to Tavily order on Cohere failure.
+    Cohere only scores documents without a cached score for this query.
+    Raises on Tavily failure. Degrades to local BM25F (or Tavily order) on Cohere failure.
     When search_query is provided (e.g. context-aware), Tavily uses it; Cohere always uses query.
+    With a deadline, each stage gets only the time remaining; Cohere also leaves reserve_sec
+    for later stages (synthesis) and is skipped (reranked=False) when that budget is too thin.
     """
-    if not config.TAVILY_API_KEY:
-        raise ValueError("TAVILY_API_KEY not configured")
-    tavily_query = (search_query or query).strip()
+    tavily_query = _tavily_query(query, search_query)
     tavily_data = tavily_search(
         config.TAVILY_API_KEY,
         tavily_query,
         max_results=20,
         topic=topic,
         days=days,
+        deadline=deadline,
     )
-    results_list = tavily_data.get("results") or []
-    # Concatenate title + content for Cohere (rerank uses current query only)
-    documents = [f"{r.get('title', '')}\n{r.get('content', '')}" for r in results_list]
+    results_list, collapsed = dedup_results(tavily_data.get("results") or [])
+    plan = _plan_rerank(query, results_list, limit)
 
-    if config.COHERE_API_KEY:
+    scores = None
+    rerank_deadline, has_budget = _rerank_deadline(deadline, reserve_sec)
+    if config.COHERE_API_KEY and has_budget:
         try:
-            scores = cohere_rerank(config.COHERE_API_KEY, query.strip(), documents, top_n=len(documents))
-            ranked = merge_and_rank(results_list, scores)
-            return SearchFlowResult(results=ranked[:limit], reranked=True)
+            scores = cohere_rerank_cached(
+                config.COHERE_API_KEY, query.strip(), plan.documents, deadline=rerank_deadline
+            )
+        except CircuitOpenError:
+            pass  # Cohere known down: degrade immediately, no per-request warning
         except Exception as e:
-            # Degrade to Tavily order; do not fail the request
+            # Degrade to local ranking; do not fail the request
             logger.warning("Cohere rerank failed: %s", e)
-            ranked = tavily_only_results(results_list)
-            return SearchFlowResult(results=ranked[:limit], reranked=False)
-    ranked = tavily_only_results(results_list)
-    return SearchFlowResult(results=ranked[:limit], reranked=False)
+    return _finish(query, results_list, plan, scores, limit, collapsed)
+
+
+async def run_search_async(
+    query: str,
+    limit: int = 10,
+    topic: str = "general",
+    days: int | None = None,
+    *,
+    search_query: str | None = None,
+    deadline: Deadline | None = None,
+    reserve_sec: float = 0.0,
+) -> SearchFlowResult:
+    """Async run_search: same flow, degradation and deadline handling, without blocking a worker thread.
+
+    Concurrent calls with the same parameters share one search; a caller only joins a
+    search running under a deadline at least as late as its own (see utils.singleflight).
+    Treat the result as read-only.
+    """
+    tavily_query = _tavily_query(query, search_query)
+    key = (normalize_query(query), normalize_query(tavily_query), limit, topic, days, reserve_sec)
+    return await search_flight.do(
+        key,
+        lambda: _run_search_async(query, tavily_query, limit, topic, days, deadline, reserve_sec),
+        deadline=deadline,
+    )
+
+
+async def _run_search_async(
+    query: str,
+    tavily_query: str,
+    limit: int,
+    topic: str,
+    days: int | None,
+    deadline: Deadline | None,
+    reserve_sec: float,
+) -> SearchFlowResult:
+    tavily_data = await tavily_search_async(
+        config.TAVILY_API_KEY,
+        tavily_query,
+        max_results=20,
+        topic=topic,
+        days=days,
+        deadline=deadline,
+    )
+    results_list, collapsed = dedup_results(tavily_data.get("results") or [])
+    plan = _plan_rerank(query, results_list, limit)
+
+    scores = None
+    rerank_deadline, has_budget = _rerank_deadline(deadline, reserve_sec)
+    if config.COHERE_API_KEY and has_budget:
+        try:
+            scores = await cohere_rerank_cached_async(
+                config.COHERE_API_KEY, query.strip(), plan.documents, deadline=rerank_deadline
+            )
+        except CircuitOpenError:
+            pass  # Cohere known down: degrade immediately, no per-request warning
+        except Exception as e:
+            # Degrade to local ranking; do not fail the request
+            logger.warning("Cohere rerank failed: %s", e)
+    return _finish(query, results_list, plan, scores, limit, collapsed)
+
+
+async def generate_answer_async(prompt: str, *, max_tokens: int = 512, deadline: Deadline | None = None) -> str:
+    """Gemini synthesis with concurrent identical prompts coalesced into one call."""
+    if not config.GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY not configured")
+    key = (config.GEMINI_MODEL, max_tokens, hashlib.sha256(prompt.encode()).hexdigest())
+    return await generate_flight.do(
+        key,
+        lambda: gemini_generate_async(config.GEMINI_API_KEY, prompt, max_tokens=max_tokens, deadline=deadline),
+        deadline=deadline,
+    )
+
+
+def flight_stats() -> dict:
+    """Single-flight counters for /health."""
+    return {"search": search_flight.stats(), "gemini": generate_flight.stats()}
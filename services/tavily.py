@@ -1,24 +1,51 @@
 """Tavily Search API client. Raises on non-200. Retries on 429/503/500.
 
 Used for live web retrieval; returns up to max_results with pre-extracted content.
+tavily_search is the sync client (scripts); tavily_search_async is used by the API.
+Both read through search_cache (TTL + LRU, keyed by normalized query, topic and
+time_range; tavily_search can opt out with use_cache=False); callers must treat the
+returned dict as read-only. Upstream calls go
+through the tavily_search circuit breaker (CircuitOpenError while it is open). When
+TAVILY_HEDGE_ENABLED is set, slow async attempts are hedged (search_hedger).
 """
 import httpx
 
-from utils.retry import retry_http
+import config
+from services.http_clients import get_async_client, get_client
+from utils.cache import TTLCache, normalize_query
+from utils.circuit_breaker import breakers
+from utils.deadline import Deadline, expires_at, raise_if_expired, stage_timeout
+from utils.hedge import Hedger
+from utils.retry import retry_http, retry_http_async
 
 TAVILY_URL = "https://api.tavily.com/search"
+TIMEOUT_SEC = 30.0
 
+search_cache = TTLCache(
+    "tavily_search",
+    max_entries=config.TAVILY_CACHE_MAX_ENTRIES,
+    default_ttl=config.TAVILY_CACHE_TTL_SEC,
+)
 
-def tavily_search(
+search_hedger = Hedger(
+    "tavily_search",
+    enabled=config.TAVILY_HEDGE_ENABLED,
+    max_rate=config.TAVILY_HEDGE_MAX_RATE,
+    percentile=config.TAVILY_HEDGE_PERCENTILE,
+    min_delay=config.TAVILY_HEDGE_MIN_DELAY_MS / 1000,
+    max_delay=config.TAVILY_HEDGE_MAX_DELAY_MS / 1000,
+)
+
+
+def _search_body(
     api_key: str,
     query: str,
-    *,
-    max_results: int = 20,
-    topic: str = "general",
-    search_depth: str = "basic",
-    days: int | None = None,
+    max_results: int,
+    topic: str,
+    search_depth: str,
+    days: int | None,
 ) -> dict:
-    """Call Tavily search API. Raises httpx.HTTPStatusError on failure."""
+    """Request body for Tavily search; maps numeric days to time_range."""
     body: dict = {
         "api_key": api_key,
         "query": query,
@@ -36,10 +63,99 @@ def tavily_search(
             body["time_range"] = "month"
         else:
             body["time_range"] = "year"
+    return body
+
+
+def _cache_key(body: dict) -> tuple:
+    return (
+        normalize_query(body["query"]),
+        body["topic"],
+        body.get("time_range"),
+        body["max_results"],
+        body["search_depth"],
+    )
+
+
+def _cache_ttl(body: dict) -> float:
+    """News and last-day searches go stale quickly; everything else keeps the default TTL."""
+    if body["topic"] == "news" or body.get("time_range") == "day":
+        return config.TAVILY_CACHE_NEWS_TTL_SEC
+    return config.TAVILY_CACHE_TTL_SEC
+
+
+def tavily_search(
+    api_key: str,
+    query: str,
+    *,
+    max_results: int = 20,
+    topic: str = "general",
+    search_depth: str = "basic",
+    days: int | None = None,
+    client: httpx.Client | None = None,
+    deadline: Deadline | None = None,
+    use_cache: bool = True,
+) -> dict:
+    """Call Tavily search API. Raises httpx.HTTPStatusError on failure.
+
+    Uses the shared pooled Tavily client unless client is given. With a deadline, the
+    call gets only the time remaining and raises DeadlineExceeded once it is spent.
+    use_cache=False always calls upstream and leaves search_cache untouched (latency
+    measurements, e.g. the offline eval, must not time cache hits).
+    """
+    body = _search_body(api_key, query, max_results, topic, search_depth, days)
+    key = _cache_key(body)
+    if use_cache:
+        cached = search_cache.get(key)
+        if cached is not None:
+            return cached
+    client = client or get_client("tavily")
+
+    def do_request():
+        try:
+            resp = client.post(TAVILY_URL, json=body, timeout=stage_timeout(deadline, TIMEOUT_SEC))
+        except httpx.TimeoutException as e:
+            raise_if_expired(deadline, e)
+            raise
+        resp.raise_for_status()
+        return resp.json()
+    breaker = breakers["tavily_search"]
+    data = retry_http(lambda: breaker.call(do_request), deadline=expires_at(deadline))
+    if use_cache:
+        search_cache.set(key, data, ttl=_cache_ttl(body))
+    return data
+
+
+async def tavily_search_async(
+    api_key: str,
+    query: str,
+    *,
+    max_results: int = 20,
+    topic: str = "general",
+    search_depth: str = "basic",
+    days: int | None = None,
+    client: httpx.AsyncClient | None = None,
+    deadline: Deadline | None = None,
+) -> dict:
+    """Async tavily_search. Raises httpx.HTTPStatusError on failure."""
+    body = _search_body(api_key, query, max_results, topic, search_depth, days)
+    key = _cache_key(body)
+    cached = search_cache.get(key)
+    if cached is not None:
+        return cached
+    client = client or get_async_client("tavily")
 
-    with httpx.Client(timeout=30.0) as client:
-        def do_request():
-            resp = client.post(TAVILY_URL, json=body)
-            resp.raise_for_status()
-            return resp.json()
-        return retry_http(do_request)
+    async def do_request():
+        try:
+            resp = await client.post(TAVILY_URL, json=body, timeout=stage_timeout(deadline, TIMEOUT_SEC))
+        except httpx.TimeoutException as e:
+            raise_if_expired(deadline, e)
+            raise
+        resp.raise_for_status()
+        return resp.json()
+    # Each attempt may be hedged; the breaker and retries see the hedged attempt as a whole
+    breaker = breakers["tavily_search"]
+    data = await retry_http_async(
+        lambda: breaker.call_async(lambda: search_hedger.run(do_request)), deadline=expires_at(deadline)
+    )
+    search_cache.set(key, data, ttl=_cache_ttl(body))
+    return data
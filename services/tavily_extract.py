@@ -4,21 +4,66 @@ Fetches and extracts clean text from given URLs; used by GET /contents.
 """
 import httpx
 
-from utils.retry import retry_http
+from services.http_clients import get_async_client, get_client
+from utils.circuit_breaker import breakers
+from utils.deadline import Deadline, expires_at, raise_if_expired, stage_timeout
+from utils.retry import retry_http, retry_http_async
 
 TAVILY_EXTRACT_URL = "https://api.tavily.com/extract"
+TIMEOUT_SEC = 45.0
 
 
-def tavily_extract(api_key: str, urls: list[str], *, format: str = "markdown") -> dict:
+def tavily_extract(
+    api_key: str,
+    urls: list[str],
+    *,
+    format: str = "markdown",
+    client: httpx.Client | None = None,
+    deadline: Deadline | None = None,
+) -> dict:
     """Extract content from URLs. Returns raw_content per URL. Raises on HTTP failure."""
     body: dict = {
         "api_key": api_key,
         "urls": urls,
         "format": format,
     }
-    with httpx.Client(timeout=45.0) as client:
-        def do_request():
-            resp = client.post(TAVILY_EXTRACT_URL, json=body)
-            resp.raise_for_status()
-            return resp.json()
-        return retry_http(do_request)
+    client = client or get_client("tavily")
+
+    def do_request():
+        try:
+            resp = client.post(TAVILY_EXTRACT_URL, json=body, timeout=stage_timeout(deadline, TIMEOUT_SEC))
+        except httpx.TimeoutException as e:
+            raise_if_expired(deadline, e)
+            raise
+        resp.raise_for_status()
+        return resp.json()
+    breaker = breakers["tavily_extract"]
+    return retry_http(lambda: breaker.call(do_request), deadline=expires_at(deadline))
+
+
+async def tavily_extract_async(
+    api_key: str,
+    urls: list[str],
+    *,
+    format: str = "markdown",
+    client: httpx.AsyncClient | None = None,
+    deadline: Deadline | None = None,
+) -> dict:
+    """Async tavily_extract. Raises on HTTP failure."""
+    body: dict = {
+        "api_key": api_key,
+        "urls": urls,
+        "format": format,
+    }
+    client = client or get_async_client("tavily")
+
+    async def do_request():
+        try:
+            resp = await client.post(TAVILY_EXTRACT_URL, json=body, timeout=stage_timeout(deadline, TIMEOUT_SEC))
+        except httpx.TimeoutException as e:
+            raise_if_expired(deadline, e)
+            raise
+        resp.raise_for_status()
+        return resp.json()
+    breaker = breakers["tavily_extract"]
+    return await retry_http_async(lambda: breaker.call_async(do_request), deadline=expires_at(deadline))
@@ -0,0 +1,146 @@
+"""Conversation store. Single source of truth for conversation data.
+
+Only this package reads/writes the store. The backend is chosen by STORE_BACKEND:
+- memory (default): in-process dict capped at MAX_CONVERSATIONS; resets on restart.
+- sqlite: SQLite file at STORE_SQLITE_PATH with an LRU hot set and batched writes;
+  capacity grows with disk while memory stays bounded.
+
+Returned conversation dicts are shared with the store: treat them as read-only and
+change them through append_message or update_conversation. "messages" holds
+store.records.MessageRecord objects (compact __slots__ records; .to_dict() gives the
+API shape) in chronological order. Messages may be passed in as records or dicts.
+
+The functions block (the sqlite backend reads from disk on a cache miss): async code
+calls them through the threadpool (run_in_threadpool / asyncio.to_thread).
+
+Version tags (conversation_version, list_version) change whenever what GET returns
+for a conversation, or for the listing, changes. They include a per-process epoch, so
+tags handed out before a restart never match afterwards.
+"""
+import threading
+import uuid
+from typing import Any
+
+import config
+from store.base import ConversationStore, decode_cursor, encode_cursor, order_key
+from store.records import MessageRecord
+from store.memory import MemoryStore
+from store.sqlite import SQLiteStore
+
+_store: ConversationStore | None = None
+_store_lock = threading.Lock()
+_epoch = ""
+
+
+def _backend() -> ConversationStore:
+    """The configured backend, opened on first use."""
+    global _store, _epoch
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _epoch = uuid.uuid4().hex[:8]
+                if config.STORE_BACKEND == "sqlite":
+                    _store = SQLiteStore(
+                        config.STORE_SQLITE_PATH,
+                        cache_size=config.STORE_CACHE_SIZE,
+                        flush_interval=config.STORE_FLUSH_INTERVAL_MS / 1000,
+                        flush_batch=config.STORE_FLUSH_BATCH,
+                    )
+                else:
+                    _store = MemoryStore()
+    return _store
+
+
+def get_conversation(conversation_id: str) -> dict[str, Any] | None:
+    """Retrieve a conversation by ID. Returns None if not found."""
+    return _backend().get(conversation_id)
+
+
+def list_conversations(page: int = 1, page_size: int = 20) -> tuple[list[dict[str, Any]], int]:
+    """
+    List conversations sorted by created_at descending.
+    Returns (paginated_conversations, total_count).
+    """
+    return _backend().list_page(page, page_size)
+
+
+def list_conversations_after(
+    cursor: str | None, page_size: int = 20
+) -> tuple[list[dict[str, Any]], int, str | None]:
+    """
+    Keyset pagination, newest first: the page after cursor (None = first page).
+    Returns (conversations, total_count, next_cursor); next_cursor is None on the last page.
+    Raises ValueError for a malformed cursor.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    items, total = _backend().list_after(after, page_size + 1)
+    if len(items) > page_size:
+        return items[:page_size], total, encode_cursor(order_key(items[page_size - 1]))
+    return items, total, None
+
+
+def conversation_cursor(conv: dict[str, Any]) -> str:
+    """Cursor that continues the listing after conv."""
+    return encode_cursor(order_key(conv))
+
+
+def create_conversation(conversation_id: str, created_at: str) -> dict[str, Any]:
+    """Create and store a new conversation. Returns the created object."""
+    return _backend().create(conversation_id, created_at)
+
+
+def update_conversation(conversation_id: str, message_count: int, messages: list[dict[str, Any]]) -> None:
+    """Update a conversation's message count and messages list. Caps messages at MAX_MESSAGES_PER_CONVERSATION."""
+    _backend().update(conversation_id, message_count, messages)
+
+
+def append_message(conversation_id: str, message: MessageRecord | dict[str, Any]) -> bool:
+    """
+    Append one message to a conversation: O(1), safe against concurrent turns on the
+    same conversation, oldest dropped past MAX_MESSAGES_PER_CONVERSATION.
+    Returns False if the conversation does not exist (e.g. deleted meanwhile).
+    """
+    return _backend().append_message(conversation_id, message)
+
+
+def set_conversation_summary(conversation_id: str, summary: str, through_message_id: str) -> bool:
+    """
+    Store the rolling history summary, covering messages up to and including through_message_id.
+    Returns False if the conversation does not exist.
+    """
+    return _backend().set_summary(conversation_id, summary, through_message_id)
+
+
+def delete_conversation(conversation_id: str) -> bool:
+    """Remove a conversation. Returns True if deleted, False if not found."""
+    return _backend().delete(conversation_id)
+
+
+def conversation_version(conversation_id: str) -> str | None:
+    """Version tag of a conversation, without copying it. None if not found."""
+    version = _backend().version(conversation_id)
+    return None if version is None else f"{_epoch}.{version}"
+
+
+def version_tag(conv: dict[str, Any]) -> str:
+    """Version tag of a conversation returned by get_conversation (as of that read)."""
+    return f"{_epoch}.{conv['version']}"
+
+
+def list_version() -> str:
+    """Version tag of the conversation listing: changes on create, delete, eviction and new messages."""
+    return f"{_epoch}.{_backend().list_version()}"
+
+
+def close_store() -> None:
+    """Flush and close the backend (app shutdown). The next call reopens it."""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
+
+
+def store_stats() -> dict:
+    """Backend name and counters for /health."""
+    return _backend().stats()
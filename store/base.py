@@ -0,0 +1,105 @@
+"""Backend interface shared by the conversation stores, and the keyset cursor format."""
+import base64
+import binascii
+import json
+import threading
+from collections import deque
+from typing import Any, Iterable, Protocol
+
+import config
+from store.records import MessageRecord, as_record
+
+# Position in the newest-first listing: (created_at, id) of the last conversation returned
+OrderKey = tuple[str, str]
+
+
+class ConversationStore(Protocol):
+    """What a store backend provides; see the store package for the public functions.
+
+    Versions (per conversation, and for the listing) come from one counter per backend
+    instance, so a value is never reused within it, e.g. by a conversation that is
+    recreated or reloaded from disk. History summaries are not part of what GET returns
+    and do not change versions.
+    """
+
+    def get(self, conversation_id: str) -> dict[str, Any] | None: ...
+
+    def list_page(self, page: int, page_size: int) -> tuple[list[dict[str, Any]], int]: ...
+
+    def list_after(self, after: OrderKey | None, limit: int) -> tuple[list[dict[str, Any]], int]: ...
+
+    def create(self, conversation_id: str, created_at: str) -> dict[str, Any]: ...
+
+    def update(self, conversation_id: str, message_count: int, messages: list[dict[str, Any]]) -> None: ...
+
+    def append_message(self, conversation_id: str, message: MessageRecord | dict[str, Any]) -> bool: ...
+
+    def set_summary(self, conversation_id: str, summary: str, through_message_id: str) -> bool: ...
+
+    def version(self, conversation_id: str) -> int | None: ...
+
+    def list_version(self) -> int: ...
+
+    def delete(self, conversation_id: str) -> bool: ...
+
+    def close(self) -> None: ...
+
+    def stats(self) -> dict: ...
+
+
+def message_log(messages: Iterable[Any] = ()) -> deque:
+    """A conversation's messages as MessageRecords: appends are O(1) and drop the oldest past MAX_MESSAGES_PER_CONVERSATION."""
+    return deque((as_record(m) for m in messages), maxlen=config.MAX_MESSAGES_PER_CONVERSATION)
+
+
+def new_conversation(conversation_id: str, created_at: str) -> dict[str, Any]:
+    """A fresh conversation: no messages, no history summary yet."""
+    return {
+        "id": conversation_id,
+        "created_at": created_at,
+        "message_count": 0,
+        "messages": message_log(),
+        "summary": "",
+        "summary_through": None,  # id of the newest message folded into summary
+        "version": 0,  # set by the backend; changes whenever what GET returns changes
+    }
+
+
+def snapshot(conv: dict[str, Any]) -> dict[str, Any]:
+    """Copy of a conversation whose messages list can be read while turns are appended."""
+    return {**conv, "messages": list(conv["messages"])}
+
+
+class StripedLocks:
+    """Fixed pool of locks; a conversation always maps to the same one.
+
+    Serializes read-modify-write on one conversation without a store-wide lock:
+    turns on different conversations rarely share a stripe.
+    """
+
+    def __init__(self, stripes: int = 64) -> None:
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def __call__(self, conversation_id: str) -> threading.Lock:
+        return self._locks[hash(conversation_id) % len(self._locks)]
+
+
+def order_key(conv: dict[str, Any]) -> OrderKey:
+    return (conv.get("created_at", ""), conv["id"])
+
+
+def encode_cursor(key: OrderKey) -> str:
+    """Opaque cursor for the position after key."""
+    return base64.urlsafe_b64encode(json.dumps(list(key), separators=(",", ":")).encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> OrderKey:
+    """Inverse of encode_cursor. Raises ValueError on a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, conversation_id = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(created_at, str) or not isinstance(conversation_id, str):
+        raise ValueError("Invalid cursor")
+    return created_at, conversation_id
@@ -0,0 +1,137 @@
+"""In-memory conversation store (STORE_BACKEND=memory, the default).
+
+Resets on server restart; no persistence. Capped at MAX_CONVERSATIONS: creating one
+over the cap evicts the oldest by created_at.
+
+Changes to one conversation (update, append_message) are serialized by striped
+per-conversation locks; messages live in a bounded deque, so appending a turn is O(1)
+and enforces the message cap without copying.
+
+A sorted list of (created_at, id) keys is kept alongside the dict, so listing a page,
+seeking a cursor and finding the oldest conversation are bisects and slices instead of
+a full sort per call. Lookups in it are O(log n); inserts, deletes and evictions shift
+the keys after that position (a memmove, O(n) but cheap at MAX_CONVERSATIONS). New
+conversations are normally the newest, so create appends at the end and moves nothing.
+"""
+import itertools
+import threading
+from bisect import bisect_left, insort
+from typing import Any
+
+import config
+from store.base import OrderKey, StripedLocks, message_log, new_conversation, order_key, snapshot
+from store.records import MessageRecord, as_record
+
+
+class MemoryStore:
+    """Conversations in a dict: conversation_id -> { id, created_at, message_count, messages }."""
+
+    def __init__(self) -> None:
+        self._conversations: dict[str, dict[str, Any]] = {}
+        self._order: list[OrderKey] = []  # ascending: oldest first
+        self._lock = threading.Lock()  # guards the index; per-conversation changes use stripes
+        self._stripes = StripedLocks()
+        self._clock = itertools.count(1)  # versions; next() is atomic
+        self._list_version = 0
+
+    def get(self, conversation_id: str) -> dict[str, Any] | None:
+        with self._stripes(conversation_id):
+            conv = self._conversations.get(conversation_id)
+            return snapshot(conv) if conv is not None else None
+
+    def _newest_first(self, start: int, end: int) -> list[dict[str, Any]]:
+        return [self._conversations[cid] for _, cid in reversed(self._order[max(0, start):max(0, end)])]
+
+    def list_page(self, page: int, page_size: int) -> tuple[list[dict[str, Any]], int]:
+        with self._lock:
+            total = len(self._order)
+            end = total - (page - 1) * page_size
+            return self._newest_first(end - page_size, end), total
+
+    def list_after(self, after: OrderKey | None, limit: int) -> tuple[list[dict[str, Any]], int]:
+        with self._lock:
+            end = bisect_left(self._order, after) if after is not None else len(self._order)
+            return self._newest_first(end - limit, end), len(self._order)
+
+    def _evict_oldest_if_over_cap(self) -> None:
+        """If over MAX_CONVERSATIONS, remove oldest by created_at."""
+        excess = len(self._order) - config.MAX_CONVERSATIONS
+        if excess <= 0:
+            return
+        self._list_version = next(self._clock)
+        for _, cid in self._order[:excess]:
+            del self._conversations[cid]
+        del self._order[:excess]
+
+    def create(self, conversation_id: str, created_at: str) -> dict[str, Any]:
+        conv = new_conversation(conversation_id, created_at)
+        conv["version"] = next(self._clock)
+        with self._lock:
+            self._evict_oldest_if_over_cap()
+            if conversation_id in self._conversations:
+                self._unindex(self._conversations[conversation_id])
+            self._conversations[conversation_id] = conv
+            # New conversations are usually the newest: insort lands at the end
+            insort(self._order, order_key(conv))
+            self._list_version = conv["version"]
+        return conv
+
+    def update(self, conversation_id: str, message_count: int, messages: list[dict[str, Any]]) -> None:
+        with self._stripes(conversation_id):
+            conv = self._conversations.get(conversation_id)
+            if conv:
+                conv["messages"] = message_log(messages)
+                conv["message_count"] = len(conv["messages"])
+                conv["version"] = self._list_version = next(self._clock)
+
+    def append_message(self, conversation_id: str, message: MessageRecord | dict[str, Any]) -> bool:
+        record = as_record(message)
+        with self._stripes(conversation_id):
+            conv = self._conversations.get(conversation_id)
+            if conv is None:
+                return False
+            conv["messages"].append(record)
+            conv["message_count"] = len(conv["messages"])
+            conv["version"] = self._list_version = next(self._clock)
+            return True
+
+    def set_summary(self, conversation_id: str, summary: str, through_message_id: str) -> bool:
+        with self._stripes(conversation_id):
+            conv = self._conversations.get(conversation_id)
+            if conv is None:
+                return False
+            conv["summary"] = summary
+            conv["summary_through"] = through_message_id
+            return True
+
+    def _unindex(self, conv: dict[str, Any]) -> None:
+        key = order_key(conv)
+        i = bisect_left(self._order, key)
+        if i < len(self._order) and self._order[i] == key:
+            del self._order[i]
+
+    def delete(self, conversation_id: str) -> bool:
+        with self._lock:
+            conv = self._conversations.pop(conversation_id, None)
+            if conv is None:
+                return False
+            self._unindex(conv)
+            self._list_version = next(self._clock)
+            return True
+
+    def version(self, conversation_id: str) -> int | None:
+        conv = self._conversations.get(conversation_id)
+        return conv["version"] if conv is not None else None
+
+    def list_version(self) -> int:
+        return self._list_version
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "conversations": len(self._conversations),
+            "max_conversations": config.MAX_CONVERSATIONS,
+        }
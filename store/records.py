@@ -0,0 +1,98 @@
+"""Compact in-memory form of stored messages.
+
+Plain dicts cost a hash table per message, per result and per citation, and every
+citation repeats the url/title of a result in the same message. Here:
+- results and messages are __slots__ records (no per-instance dict);
+- citations are indexes into the message's results (a citation that matches no
+  result is kept as its own record);
+- ids, urls and titles are interned, so a page that shows up across many messages
+  and conversations is stored once.
+
+to_dict()/from_dict() convert to and from the API/JSON shape (the SQLite on-disk
+format is unchanged).
+"""
+import sys
+from typing import Any, Iterator
+
+
+class ResultRecord:
+    """One search result (also the source of a citation)."""
+
+    __slots__ = ("id", "url", "title", "snippet", "score", "rank")
+
+    def __init__(self, id: str, url: str, title: str, snippet: str, score: float, rank: int) -> None:
+        self.id = sys.intern(id)
+        self.url = sys.intern(url)
+        self.title = sys.intern(title)
+        self.snippet = snippet
+        self.score = score
+        self.rank = rank
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> "ResultRecord":
+        return cls(d.get("id", ""), d["url"], d["title"], d.get("snippet", ""), d["score"], d["rank"])
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "url": self.url,
+            "title": self.title,
+            "snippet": self.snippet,
+            "score": self.score,
+            "rank": self.rank,
+        }
+
+    def citation_dict(self) -> dict[str, Any]:
+        return {"title": self.title, "url": self.url, "score": self.score, "rank": self.rank}
+
+
+class MessageRecord:
+    """One conversation turn. Immutable once stored; snapshots share instances."""
+
+    __slots__ = ("id", "query", "answer", "created_at", "results", "cited")
+
+    def __init__(
+        self,
+        id: str,
+        query: str,
+        answer: str,
+        created_at: str,
+        results: tuple[ResultRecord, ...],
+        cited: tuple[int | ResultRecord, ...],
+    ) -> None:
+        self.id = id
+        self.query = query
+        self.answer = answer
+        self.created_at = sys.intern(created_at)
+        self.results = results
+        self.cited = cited  # index into results, or a standalone record
+
+    @property
+    def citations(self) -> Iterator[ResultRecord]:
+        for c in self.cited:
+            yield self.results[c] if isinstance(c, int) else c
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> "MessageRecord":
+        results = tuple(ResultRecord.from_dict(r) for r in d.get("results", ()))
+        by_citation = {(r.url, r.title, r.score, r.rank): i for i, r in reversed(list(enumerate(results)))}
+        cited: list[int | ResultRecord] = []
+        for c in d.get("citations", ()):
+            idx = by_citation.get((c["url"], c["title"], c["score"], c["rank"]))
+            cited.append(idx if idx is not None else ResultRecord("", c["url"], c["title"], "", c["score"], c["rank"]))
+        return cls(d["id"], d["query"], d["answer"], d["created_at"], results, tuple(cited))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "query": self.query,
+            "answer": self.answer,
+            "citations": [c.citation_dict() for c in self.citations],
+            "results": [r.to_dict() for r in self.results],
+            "created_at": self.created_at,
+        }
+
+
+def as_record(message: "MessageRecord | dict[str, Any]") -> MessageRecord:
+    """Store-side form of a message given as a record or an API-shaped dict."""
+    return message if isinstance(message, MessageRecord) else MessageRecord.from_dict(message)
@@ -0,0 +1,492 @@
+"""SQLite conversation store (STORE_BACKEND=sqlite): capacity bounded by disk, not RAM.
+
+- WAL mode; conversations listed via an index on (created_at, id): page/offset, or
+  keyset (list_after) so deep pages cost the same as the first. The total is kept
+  in memory rather than counted per list.
+- Messages are rows keyed by (conversation_id, seq), so reading one conversation is
+  one indexed range scan.
+- Hot conversations stay in an LRU cache of STORE_CACHE_SIZE entries.
+- Writes are write-behind: applied to memory immediately and flushed to disk in one
+  transaction every STORE_FLUSH_INTERVAL_MS, or sooner once STORE_FLUSH_BATCH
+  conversations are dirty. append_message only inserts the new rows (and trims rows
+  past the message cap); update rewrites the conversation's messages. Up to one interval of writes can be lost on a crash;
+  close() flushes everything.
+- Reads never wait for a flush: dirty and in-flight conversations are served from
+  memory, and lists merge them over what is on disk. The flusher writes on its own
+  connection without holding the store lock (WAL lets readers carry on).
+- Changes to one conversation are serialized by striped per-conversation locks, as in
+  the memory backend. The store-wide lock only guards the cache and flush maps and is
+  never held for disk I/O: a cache miss reads on the calling thread's own connection
+  while holding just that conversation's stripe.
+- Conversation versions are persisted with the row, so version() on a conversation
+  that is not in memory is a one-column lookup.
+
+Calls come from the threadpool and the flusher thread; async code should not call
+the store on the event loop (a cache miss reads from disk).
+"""
+import itertools
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from store.base import OrderKey, StripedLocks, message_log, new_conversation, order_key, snapshot
+from store.records import MessageRecord, as_record
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    summary TEXT NOT NULL DEFAULT '',
+    summary_through TEXT,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_conversations_created_at ON conversations (created_at DESC, id DESC);
+CREATE TABLE IF NOT EXISTS messages (
+    conversation_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (conversation_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+def _dumps(message: MessageRecord) -> str:
+    return json.dumps(message.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+
+def _merge(
+    rows: list[tuple[str, str, int]], overlay: dict[str, dict[str, Any] | None], after: OrderKey | None
+) -> list[dict[str, Any]]:
+    """List items newest first: disk rows with unflushed creates, deletes and counts applied.
+
+    rows must be the newest rows (after `after`) and include len(overlay) more than the
+    caller needs: each overlay entry hides at most one of them.
+    """
+    items = {r[0]: {"id": r[0], "created_at": r[1], "message_count": r[2]} for r in rows if r[0] not in overlay}
+    for conv in overlay.values():
+        if conv is not None and (after is None or order_key(conv) < after):
+            items[conv["id"]] = {"id": conv["id"], "created_at": conv["created_at"], "message_count": conv["message_count"]}
+    return sorted(items.values(), key=order_key, reverse=True)
+
+
+class SQLiteStore:
+    """SQLite-backed store with an in-memory hot set and batched write-behind."""
+
+    def __init__(self, path: str, *, cache_size: int, flush_interval: float, flush_batch: int) -> None:
+        self.path = path
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        # Writer: used by flushes only (and setup/close), serialized by _write_lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._total = self._conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+        max_version = self._conn.execute("SELECT COALESCE(MAX(version), 0) FROM conversations").fetchone()[0]
+        self._write_lock = threading.Lock()
+        # Readers: one connection per thread, opened on first use (see _reader)
+        self._local = threading.local()
+        self._readers: list[sqlite3.Connection] = []
+        # _lock guards the cache, the flush maps and counters (memory only, held briefly);
+        # changes to one conversation are serialized by its stripe
+        self._lock = threading.RLock()
+        self._stripes = StripedLocks()
+        self._cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        # Dirty conversations awaiting flush: id -> conversation to write, or None to delete
+        self._pending: dict[str, dict[str, Any] | None] = {}
+        # Persisted conversations with only appended messages and/or a new summary:
+        # id -> (conversation, new messages)
+        self._appends: dict[str, tuple[dict[str, Any], list[MessageRecord]]] = {}
+        # Taken by a flush that is writing them now (same shapes); still read from memory
+        self._flushing: dict[str, dict[str, Any] | None] = {}
+        self._flushing_appends: dict[str, tuple[dict[str, Any], list[MessageRecord]]] = {}
+        self._clock = itertools.count(max_version + 1)  # versions
+        self._list_version = 0
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+        self._closed = False
+        self._wake = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="store-flush", daemon=True)
+        self._flusher.start()
+
+    def _migrate(self) -> None:
+        """Add columns introduced after a database was created."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(conversations)")}
+        with self._conn:
+            if "summary" not in columns:
+                self._conn.execute("ALTER TABLE conversations ADD COLUMN summary TEXT NOT NULL DEFAULT ''")
+            if "summary_through" not in columns:
+                self._conn.execute("ALTER TABLE conversations ADD COLUMN summary_through TEXT")
+            if "version" not in columns:
+                self._conn.execute("ALTER TABLE conversations ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    # --- reads ---
+
+    def get(self, conversation_id: str) -> dict[str, Any] | None:
+        with self._stripes(conversation_id):
+            # Writers to this conversation hold the same stripe: the snapshot is consistent
+            conv = self._lookup(conversation_id)
+            return snapshot(conv) if conv is not None else None
+
+    def _in_memory(self, conversation_id: str) -> tuple[bool, dict[str, Any] | None]:
+        """(True, conv or None if deleted) for dirty or in-flight conversations; else (False, None)."""
+        if conversation_id in self._pending:
+            return True, self._pending[conversation_id]
+        if conversation_id in self._appends:
+            return True, self._appends[conversation_id][0]
+        if conversation_id in self._flushing:
+            return True, self._flushing[conversation_id]
+        if conversation_id in self._flushing_appends:
+            return True, self._flushing_appends[conversation_id][0]
+        return False, None
+
+    def _lookup(self, conversation_id: str) -> dict[str, Any] | None:
+        """The live conversation object: dirty, in flight, cached or loaded from disk.
+
+        Call with the conversation's stripe held. A miss reads from disk without the
+        store lock, so it never holds up other conversations.
+        """
+        with self._lock:
+            dirty, conv = self._in_memory(conversation_id)
+            if dirty:
+                return conv
+            conv = self._cache.get(conversation_id)
+            if conv is not None:
+                self._cache.move_to_end(conversation_id)
+                self.hits += 1
+                return conv
+            self.misses += 1
+        # Not in memory, so nothing is waiting to be flushed for it, and the stripe keeps
+        # writers of this conversation out until it is cached: the disk copy is current
+        conv = self._load(conversation_id)
+        if conv is not None:
+            with self._lock:
+                self._remember(conv)
+        return conv
+
+    def _reader(self) -> sqlite3.Connection:
+        """This thread's read connection (WAL: readers run in parallel with each other and the flush)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._local.conn = conn
+            with self._lock:
+                self._readers.append(conn)
+        return conn
+
+    def _load(self, conversation_id: str) -> dict[str, Any] | None:
+        reader = self._reader()
+        row = reader.execute(
+            "SELECT created_at, message_count, summary, summary_through, version FROM conversations WHERE id = ?",
+            (conversation_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        messages = message_log(
+            json.loads(data)
+            for (data,) in reader.execute(
+                "SELECT data FROM messages WHERE conversation_id = ? ORDER BY seq", (conversation_id,)
+            )
+        )
+        return {
+            "id": conversation_id,
+            "created_at": row[0],
+            "message_count": row[1],
+            "messages": messages,
+            "summary": row[2],
+            "summary_through": row[3],
+            "version": row[4],
+        }
+
+    def version(self, conversation_id: str) -> int | None:
+        """Current version without loading the conversation: memory, else the version column."""
+        with self._lock:
+            dirty, conv = self._in_memory(conversation_id)
+            if not dirty:
+                conv = self._cache.get(conversation_id)
+            if conv is not None:
+                return conv["version"]
+            if dirty:
+                return None  # deleted, not flushed yet
+        row = self._reader().execute("SELECT version FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+        return row[0] if row is not None else None
+
+    def list_version(self) -> int:
+        return self._list_version
+
+    def _exists(self, conversation_id: str) -> bool:
+        """Call with the conversation's stripe held; reads disk without the store lock."""
+        with self._lock:
+            dirty, conv = self._in_memory(conversation_id)
+            if dirty:
+                return conv is not None
+            if conversation_id in self._cache:
+                return True
+        return self._reader().execute("SELECT 1 FROM conversations WHERE id = ?", (conversation_id,)).fetchone() is not None
+
+    def list_page(self, page: int, page_size: int) -> tuple[list[dict[str, Any]], int]:
+        """Newest first. Items carry id, created_at and message_count (no messages)."""
+        offset = (page - 1) * page_size
+        with self._lock:
+            overlay, total = self._overlay(), self._total
+        if not overlay:
+            rows = self._reader().execute(
+                "SELECT id, created_at, message_count FROM conversations "
+                "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+                (page_size, offset),
+            ).fetchall()
+            return [{"id": r[0], "created_at": r[1], "message_count": r[2]} for r in rows], total
+        # Unflushed changes shift positions: merge from the top (bounded by the flush batch)
+        rows = self._reader().execute(
+            "SELECT id, created_at, message_count FROM conversations "
+            "ORDER BY created_at DESC, id DESC LIMIT ?",
+            (offset + page_size + len(overlay),),
+        ).fetchall()
+        return _merge(rows, overlay, None)[offset:offset + page_size], total
+
+    def list_after(self, after: OrderKey | None, limit: int) -> tuple[list[dict[str, Any]], int]:
+        """Newest first, starting after the (created_at, id) key; an index seek, no OFFSET scan."""
+        if after is None:
+            return self.list_page(1, limit)
+        with self._lock:
+            overlay, total = self._overlay(), self._total
+        rows = self._reader().execute(
+            "SELECT id, created_at, message_count FROM conversations "
+            "WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?",
+            (after[0], after[1], limit + len(overlay)),
+        ).fetchall()
+        return _merge(rows, overlay, after)[:limit], total
+
+    def _overlay(self) -> dict[str, dict[str, Any] | None]:
+        """Conversations whose disk row may be stale: id -> live conversation, or None if deleted.
+
+        Taken before reading disk: a flush that lands in between only makes the overlay
+        redundant for the rows it wrote.
+        """
+        overlay: dict[str, dict[str, Any] | None] = {cid: conv for cid, (conv, _) in self._flushing_appends.items()}
+        overlay.update(self._flushing)
+        overlay.update((cid, conv) for cid, (conv, _) in self._appends.items())
+        overlay.update(self._pending)
+        return overlay
+
+    # --- writes (applied in memory now, flushed later) ---
+    # Each holds the conversation's stripe throughout (a cache miss loads from disk first)
+    # and the store lock only while it changes the conversation and the flush maps, which
+    # flush() reads under that lock.
+
+    def create(self, conversation_id: str, created_at: str) -> dict[str, Any]:
+        conv = new_conversation(conversation_id, created_at)
+        with self._stripes(conversation_id):
+            exists = self._exists(conversation_id)
+            with self._lock:
+                if not exists:
+                    self._total += 1
+                conv["version"] = self._list_version = next(self._clock)
+                self._remember(conv)
+                self._mark_dirty(conversation_id, conv)
+        return conv
+
+    def update(self, conversation_id: str, message_count: int, messages: list[dict[str, Any]]) -> None:
+        with self._stripes(conversation_id):
+            conv = self._lookup(conversation_id)
+            if not conv:
+                return
+            with self._lock:
+                conv["messages"] = message_log(messages)
+                conv["message_count"] = len(conv["messages"])
+                conv["version"] = self._list_version = next(self._clock)
+                self._appends.pop(conversation_id, None)  # superseded by the full rewrite
+                self._mark_dirty(conversation_id, conv)
+
+    def append_message(self, conversation_id: str, message: MessageRecord | dict[str, Any]) -> bool:
+        record = as_record(message)
+        with self._stripes(conversation_id):
+            conv = self._lookup(conversation_id)
+            if conv is None:
+                return False
+            with self._lock:
+                conv["messages"].append(record)
+                conv["message_count"] = len(conv["messages"])
+                conv["version"] = self._list_version = next(self._clock)
+                if conversation_id not in self._pending:
+                    # Not otherwise dirty: flush inserts just the new rows
+                    self._appends.setdefault(conversation_id, (conv, []))[1].append(record)
+                    self._wake_if_full()
+            return True
+
+    def set_summary(self, conversation_id: str, summary: str, through_message_id: str) -> bool:
+        with self._stripes(conversation_id):
+            conv = self._lookup(conversation_id)
+            if conv is None:
+                return False
+            with self._lock:
+                conv["summary"] = summary
+                conv["summary_through"] = through_message_id
+                if conversation_id not in self._pending:
+                    # Row-only change: rides the append path with no new messages
+                    self._appends.setdefault(conversation_id, (conv, []))
+                    self._wake_if_full()
+            return True
+
+    def delete(self, conversation_id: str) -> bool:
+        with self._stripes(conversation_id):
+            if not self._exists(conversation_id):
+                return False
+            with self._lock:
+                self._appends.pop(conversation_id, None)
+                self._cache.pop(conversation_id, None)
+                self._mark_dirty(conversation_id, None)
+                self._total -= 1
+                self._list_version = next(self._clock)
+            return True
+
+    def _remember(self, conv: dict[str, Any]) -> None:
+        self._cache[conv["id"]] = conv
+        self._cache.move_to_end(conv["id"])
+        while len(self._cache) > self.cache_size:
+            # Dirty entries stay reachable through _pending until flushed
+            self._cache.popitem(last=False)
+
+    def _mark_dirty(self, conversation_id: str, conv: dict[str, Any] | None) -> None:
+        self._pending[conversation_id] = conv
+        self._wake_if_full()
+
+    def _wake_if_full(self) -> None:
+        if len(self._pending) + len(self._appends) >= self.flush_batch:
+            self._wake.set()
+
+    # --- flushing ---
+
+    def flush(self) -> None:
+        """Write all pending changes to disk in one transaction.
+
+        The store lock is held only to take the batch and to release it; the disk
+        writes run on the writer connection while reads and writes carry on in memory.
+        """
+        with self._write_lock:
+            with self._lock:
+                if not self._pending and not self._appends:
+                    return
+                self._flushing, self._pending = self._pending, {}
+                self._flushing_appends, self._appends = self._appends, {}
+                # Copy what gets written: the live objects keep changing meanwhile
+                rewrites = [
+                    (cid, None if conv is None else (
+                        conv["created_at"], conv["message_count"], conv["summary"],
+                        conv["summary_through"], conv["version"], list(conv["messages"]),
+                    ))
+                    for cid, conv in self._flushing.items()
+                ]
+                appended = [
+                    (cid, conv["message_count"], conv["summary"], conv["summary_through"],
+                     conv["version"], conv["messages"].maxlen, list(new_messages))
+                    for cid, (conv, new_messages) in self._flushing_appends.items()
+                ]
+            try:
+                self._write(rewrites, appended)
+            except Exception:
+                with self._lock:
+                    self._requeue()
+                raise
+            with self._lock:
+                self._flushing, self._flushing_appends = {}, {}
+                self.flushes += 1
+
+    def _write(self, rewrites: list[tuple], appended: list[tuple]) -> None:
+        with self._conn:
+            for conversation_id, row in rewrites:
+                self._conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+                if row is None:
+                    self._conn.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+                    continue
+                created_at, message_count, summary, summary_through, version, messages = row
+                self._conn.execute(
+                    "INSERT INTO conversations (id, created_at, message_count, summary, summary_through, version) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET message_count = excluded.message_count, "
+                    "summary = excluded.summary, summary_through = excluded.summary_through, version = excluded.version",
+                    (conversation_id, created_at, message_count, summary, summary_through, version),
+                )
+                self._conn.executemany(
+                    "INSERT INTO messages (conversation_id, seq, data) VALUES (?, ?, ?)",
+                    ((conversation_id, seq, _dumps(m)) for seq, m in enumerate(messages)),
+                )
+            for conversation_id, message_count, summary, summary_through, version, maxlen, new_messages in appended:
+                if not new_messages:
+                    self._conn.execute(
+                        "UPDATE conversations SET summary = ?, summary_through = ? WHERE id = ?",
+                        (summary, summary_through, conversation_id),
+                    )
+                    continue
+                self._conn.executemany(
+                    "INSERT INTO messages (conversation_id, seq, data) "
+                    "SELECT ?, COALESCE(MAX(seq), -1) + 1, ? FROM messages WHERE conversation_id = ?",
+                    ((conversation_id, _dumps(m), conversation_id) for m in new_messages),
+                )
+                # Oldest rows past the cap (the in-memory deque has already dropped them)
+                self._conn.execute(
+                    "DELETE FROM messages WHERE conversation_id = ? AND seq < "
+                    "(SELECT MAX(seq) FROM messages WHERE conversation_id = ?) - ? + 1",
+                    (conversation_id, conversation_id, maxlen),
+                )
+                self._conn.execute(
+                    "UPDATE conversations SET message_count = ?, summary = ?, summary_through = ?, version = ? "
+                    "WHERE id = ?",
+                    (message_count, summary, summary_through, version, conversation_id),
+                )
+
+    def _requeue(self) -> None:
+        """After a failed flush: keep its changes for the next one; newer writes win."""
+        batch, appends = self._flushing, self._flushing_appends
+        self._flushing, self._flushing_appends = {}, {}
+        self._pending = {**batch, **self._pending}
+        for conversation_id in self._pending:
+            # A full rewrite (from the live conversation) already includes any appends
+            self._appends.pop(conversation_id, None)
+        for conversation_id, (conv, new_messages) in appends.items():
+            if conversation_id in self._pending:
+                continue  # a later update/delete supersedes these appends
+            later = self._appends.get(conversation_id, (conv, []))[1]
+            self._appends[conversation_id] = (conv, new_messages + later)
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Conversation store flush failed")
+
+    def close(self) -> None:
+        """Stop the flusher, write everything pending and close the database."""
+        self._closed = True
+        self._wake.set()
+        self._flusher.join()
+        self.flush()
+        with self._lock:
+            for reader in self._readers:
+                reader.close()
+            self._conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "sqlite",
+                "cached": len(self._cache),
+                "max_cached": self.cache_size,
+                "pending_writes": len(self._pending) + len(self._appends),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "flushes": self.flushes,
+            }
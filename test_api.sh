@@ -9,7 +9,15 @@ echo "=== 1. Health ==="
 curl -s "$API/health" || { echo "FAIL: Is the server running? Try: bun run api"; exit 1; }
 echo -e "\n"
 
-echo "=== 2. Create conversation ==="
+echo "=== 2. Stream an answer (SSE) ==="
+# -N: print events as they arrive; expect citations, token..., then done (or error)
+EVENTS=$(curl -s -N "$API/answer/stream?q=what+is+SVB")
+echo "$EVENTS"
+echo "$EVENTS" | grep -q "^event: citations" || { echo "FAIL: no citations event"; exit 1; }
+echo "$EVENTS" | grep -q "^event: \(done\|error\)" || { echo "FAIL: stream did not end with done or error"; exit 1; }
+echo ""
+
+echo "=== 3. Create conversation ==="
 RESP=$(curl -s -X POST "$API/conversations")
 echo "$RESP"
 
@@ -22,25 +30,25 @@ fi
 echo "Created ID: $CONV"
 echo ""
 
-echo "=== 3. List conversations ==="
+echo "=== 4. List conversations ==="
 curl -s "$API/conversations?page=1&page_size=10"
 echo -e "\n"
 
-echo "=== 4. Get conversation ==="
+echo "=== 5. Get conversation ==="
 curl -s "$API/conversations/$CONV"
 echo -e "\n"
 
-echo "=== 5. Add message ==="
+echo "=== 6. Add message ==="
 curl -s -X POST "$API/conversations/$CONV/messages" \
   -H "Content-Type: application/json" \
   -d '{"query": "what is SVB"}'
 echo -e "\n"
 
-echo "=== 6. Get conversation (with messages) ==="
+echo "=== 7. Get conversation (with messages) ==="
 curl -s "$API/conversations/$CONV"
 echo -e "\n"
 
-echo "=== 7. Delete conversation ==="
+echo "=== 8. Delete conversation ==="
 STATUS=$(curl -s -o /dev/null -w "%{http_code}" -X DELETE "$API/conversations/$CONV")
 echo "Status: $STATUS (expect 204)"
 echo ""
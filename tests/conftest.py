@@ -0,0 +1,17 @@
+"""Shared pytest setup: import the app modules from the repo root, with no real API keys."""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def no_api_keys(monkeypatch):
+    """Tests never reach real upstreams; each test sets the keys it needs."""
+    monkeypatch.setattr(config, "TAVILY_API_KEY", None)
+    monkeypatch.setattr(config, "COHERE_API_KEY", None)
+    monkeypatch.setattr(config, "GEMINI_API_KEY", None)
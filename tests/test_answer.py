@@ -0,0 +1,59 @@
+"""/answer/stream when Gemini streams no text."""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import config
+import main
+from models.search import SearchResult
+from routers import answer
+from services.search_flow import SearchFlowResult
+
+RESULTS = [
+    SearchResult(id=f"r{i}", url=f"https://a.example/{i}", title=f"Title {i}", snippet="text", score=0.9 - i / 10, rank=i + 1)
+    for i in range(5)
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(config, "TAVILY_API_KEY", "test-key")
+    monkeypatch.setattr(config, "GEMINI_API_KEY", "test-key")
+
+    async def fake_search(*args, **kwargs):
+        return SearchFlowResult(results=RESULTS, reranked=False, ranker="local")
+
+    monkeypatch.setattr(answer, "run_search_async", fake_search)
+    return TestClient(main.app)
+
+
+def _events(text: str) -> list[tuple[str, dict]]:
+    events = []
+    for frame in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_empty_stream_is_an_error_and_not_cached(client, monkeypatch):
+    async def no_text(api_key, prompt, **kwargs):
+        # e.g. finishReason SAFETY: chunks arrive, none carries text
+        return
+        yield
+
+    async def real_answer(prompt, **kwargs):
+        return "An answer."
+
+    monkeypatch.setattr(answer, "gemini_stream_async", no_text)
+    r = client.get("/answer/stream", params={"q": "blocked question"})
+    assert r.status_code == 200
+    events = _events(r.text)
+    assert [name for name, _ in events] == ["citations", "error"]
+    assert events[-1][1] == {"error": "Gemini returned no content", "code": "ANSWER_FAILED"}
+
+    monkeypatch.setattr(answer, "generate_answer_async", real_answer)
+    r = client.get("/answer", params={"q": "blocked question"})
+    assert r.status_code == 200
+    assert r.json()["answer"] == "An answer."
+    assert r.json()["cached"] is False
@@ -0,0 +1,65 @@
+"""Circuit breakers judge each upstream attempt, not a whole retried call."""
+import asyncio
+
+import httpx
+import pytest
+
+from services.cohere_service import cohere_rerank, cohere_rerank_async
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, breakers
+
+RETRY_AFTER_SEC = "0.3"
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    # Slow-call threshold well under the Retry-After wait between attempts
+    fresh = CircuitBreaker(
+        "cohere", failure_rate=1.0, slow_call_sec=0.2, window=10, min_calls=10, open_sec=30, half_open_calls=1
+    )
+    monkeypatch.setitem(breakers, "cohere", fresh)
+    return fresh
+
+
+def _flaky_upstream():
+    """503 with a Retry-After once, then a fast success."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            return httpx.Response(503, headers={"Retry-After": RETRY_AFTER_SEC}, request=request)
+        return httpx.Response(200, json={"results": [{"index": 0, "relevance_score": 0.9}]}, request=request)
+
+    return httpx.MockTransport(handler), calls
+
+
+def test_retry_wait_is_not_a_slow_call(breaker):
+    transport, calls = _flaky_upstream()
+    with httpx.Client(transport=transport) as client:
+        assert cohere_rerank("key", "q", ["doc"], client=client) == [(0, 0.9)]
+    assert len(calls) == 2
+    # One failed attempt, one fast success; the backoff sleep is charged to neither
+    assert list(breaker._outcomes) == [True, False]
+
+
+def test_retry_wait_is_not_a_slow_call_async(breaker):
+    transport, calls = _flaky_upstream()
+
+    async def main():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await cohere_rerank_async("key", "q", ["doc"], client=client)
+
+    assert asyncio.run(main()) == [(0, 0.9)]
+    assert len(calls) == 2
+    assert list(breaker._outcomes) == [True, False]
+
+
+def test_open_breaker_stops_remaining_attempts(monkeypatch):
+    fresh = CircuitBreaker(
+        "cohere", failure_rate=1.0, slow_call_sec=10, window=1, min_calls=1, open_sec=30, half_open_calls=1
+    )
+    monkeypatch.setitem(breakers, "cohere", fresh)
+    transport, calls = _flaky_upstream()
+    with httpx.Client(transport=transport) as client, pytest.raises(CircuitOpenError):
+        cohere_rerank("key", "q", ["doc"], client=client)
+    assert len(calls) == 1
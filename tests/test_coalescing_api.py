@@ -0,0 +1,66 @@
+"""A burst of identical API requests, each with its own request deadline, makes one upstream call."""
+import asyncio
+
+import httpx
+import pytest
+
+import config
+import main
+from services import search_flow
+from utils.singleflight import SingleFlight
+
+BURST = 10
+UPSTREAM_SEC = 0.2
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    monkeypatch.setattr(config, "TAVILY_API_KEY", "test-key")
+    monkeypatch.setattr(config, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(search_flow, "search_flight", SingleFlight("search"))
+    monkeypatch.setattr(search_flow, "generate_flight", SingleFlight("gemini"))
+    calls = {"tavily": 0, "gemini": 0}
+
+    async def fake_tavily(api_key, query, **kwargs):
+        calls["tavily"] += 1
+        await asyncio.sleep(UPSTREAM_SEC)
+        return {"results": [
+            {"url": f"https://a.example/{i}", "title": f"Title {i}", "content": f"{query} text {i}", "score": 0.5}
+            for i in range(5)
+        ]}
+
+    async def fake_gemini(api_key, prompt, **kwargs):
+        calls["gemini"] += 1
+        await asyncio.sleep(UPSTREAM_SEC)
+        return "An answer."
+
+    monkeypatch.setattr(search_flow, "tavily_search_async", fake_tavily)
+    monkeypatch.setattr(search_flow, "gemini_generate_async", fake_gemini)
+    return calls
+
+
+async def _burst(path: str) -> list[httpx.Response]:
+    """BURST identical requests, 5 ms apart; each gets the server's default deadline."""
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        tasks = []
+        for _ in range(BURST):
+            tasks.append(asyncio.ensure_future(client.get(path)))
+            await asyncio.sleep(0.005)
+        return await asyncio.gather(*tasks)
+
+
+def test_search_burst_makes_one_tavily_call(upstream):
+    responses = asyncio.run(_burst("/search?q=coalesce+search+burst"))
+    assert [r.status_code for r in responses] == [200] * BURST
+    assert upstream["tavily"] == 1
+    stats = search_flow.flight_stats()["search"]
+    assert stats["coalesced"] == BURST - 1 and stats["deadline_splits"] == 0
+
+
+def test_answer_burst_makes_one_search_and_one_gemini_call(upstream):
+    responses = asyncio.run(_burst("/answer?q=coalesce+answer+burst"))
+    assert [r.status_code for r in responses] == [200] * BURST
+    assert {r.json()["answer"] for r in responses} == {"An answer."}
+    assert upstream == {"tavily": 1, "gemini": 1}
+    assert search_flow.flight_stats()["gemini"]["coalesced"] == BURST - 1
@@ -0,0 +1,94 @@
+"""Add-message endpoints when the turn cannot be stored (conversation deleted, no answer text)."""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import config
+import main
+from models.search import SearchResult
+from routers import conversations
+from services.search_flow import SearchFlowResult
+from store import delete_conversation, get_conversation
+
+RESULTS = [
+    SearchResult(id=f"r{i}", url=f"https://a.example/{i}", title=f"Title {i}", snippet="text", score=0.9 - i / 10, rank=i + 1)
+    for i in range(5)
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(config, "TAVILY_API_KEY", "test-key")
+    monkeypatch.setattr(config, "GEMINI_API_KEY", "test-key")
+
+    async def fake_search(*args, **kwargs):
+        return SearchFlowResult(results=RESULTS, reranked=False, ranker="local")
+
+    monkeypatch.setattr(conversations, "run_search_async", fake_search)
+    return TestClient(main.app)
+
+
+def _events(text: str) -> list[tuple[str, dict]]:
+    events = []
+    for frame in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_add_message_stores_turn(client, monkeypatch):
+    async def fake_answer(prompt, **kwargs):
+        return "An answer [1]."
+
+    monkeypatch.setattr(conversations, "generate_answer_async", fake_answer)
+    cid = client.post("/conversations").json()["id"]
+    r = client.post(f"/conversations/{cid}/messages", json={"query": "hello"})
+    assert r.status_code == 200
+    assert get_conversation(cid)["messages"][-1].id == r.json()["id"]
+
+
+def test_add_message_404_when_deleted_mid_turn(client, monkeypatch):
+    cid = client.post("/conversations").json()["id"]
+
+    async def answer_after_delete(prompt, **kwargs):
+        delete_conversation(cid)
+        return "An answer."
+
+    monkeypatch.setattr(conversations, "generate_answer_async", answer_after_delete)
+    r = client.post(f"/conversations/{cid}/messages", json={"query": "hello"})
+    assert r.status_code == 404
+    assert r.json() == {"error": "Conversation not found", "code": "CONVERSATION_NOT_FOUND"}
+    assert get_conversation(cid) is None
+
+
+def test_stream_error_event_when_deleted_mid_turn(client, monkeypatch):
+    cid = client.post("/conversations").json()["id"]
+
+    async def stream_after_delete(api_key, prompt, **kwargs):
+        delete_conversation(cid)
+        yield "An "
+        yield "answer."
+
+    monkeypatch.setattr(conversations, "gemini_stream_async", stream_after_delete)
+    r = client.post(f"/conversations/{cid}/messages/stream", json={"query": "hello"})
+    assert r.status_code == 200
+    events = _events(r.text)
+    assert [name for name, _ in events] == ["results", "citations", "token", "token", "error"]
+    assert events[-1][1] == {"error": "Conversation not found", "code": "CONVERSATION_NOT_FOUND"}
+
+
+def test_stream_with_no_text_stores_nothing(client, monkeypatch):
+    cid = client.post("/conversations").json()["id"]
+
+    async def no_text(api_key, prompt, **kwargs):
+        return
+        yield
+
+    monkeypatch.setattr(conversations, "gemini_stream_async", no_text)
+    r = client.post(f"/conversations/{cid}/messages/stream", json={"query": "hello"})
+    events = _events(r.text)
+    assert [name for name, _ in events] == ["results", "citations", "error"]
+    assert events[-1][1] == {"error": "Gemini returned no content", "code": "ANSWER_FAILED"}
+    conv = get_conversation(cid)
+    assert conv["message_count"] == 0 and not conv["messages"]
@@ -0,0 +1,40 @@
+"""Local BM25F ranker: fast tokenizer matches the \\w+ regex, counts match a plain loop."""
+import re
+from collections import Counter
+
+import pytest
+
+from services.reranker import _term_frequencies, _tokens, bm25f_scores
+
+SAMPLES = [
+    "FastAPI — a “modern” web-framework for Python 3.11!",
+    "Straße café naïve déjà_vu ΣΊΣΥΦΟΣ 東京タワー ١٢٣",
+    "tabs\tand\nnewlines, e-mail@example.com; snake_case",
+    "emoji 🚀rocket and 𝔘𝔫𝔦𝔠𝔬𝔡𝔢 math letters",
+    "",
+]
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_tokens_match_word_regex(text):
+    assert _tokens(text) == re.findall(r"\w+", text.casefold())
+
+
+def test_term_frequencies_match_a_counting_loop():
+    texts = ["python web python", "The Web, the web!", "", "nothing relevant"]
+    column = {"python": 0, "web": 1, "the": 2}
+    tf, lengths = _term_frequencies(texts, column)
+    for i, text in enumerate(texts):
+        counts = Counter(_tokens(text))
+        assert list(tf[i]) == [counts[t] for t in column]
+        assert lengths[i] == len(_tokens(text))
+
+
+def test_matching_result_ranks_first():
+    results = [
+        {"title": "Cooking pasta", "content": "Boil water and add salt."},
+        {"title": "FastAPI tutorial", "content": "FastAPI is a Python web framework."},
+    ]
+    scores = bm25f_scores("python fastapi framework", results)
+    assert scores[0] == (1, 1.0)
+    assert scores[1] == (0, 0.0)
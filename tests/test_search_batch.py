@@ -0,0 +1,55 @@
+"""POST /search/batch: each item's time budget starts when it runs, not while it queues."""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import config
+import main
+from models.search import SearchResult
+from routers import search
+from services.search_flow import SearchFlowResult
+from utils.deadline import DeadlineExceeded
+
+ITEM_SEC = 0.1
+
+
+@pytest.fixture
+def budgets(monkeypatch):
+    """Run items one at a time; each takes ITEM_SEC and needs that much budget left when it starts."""
+    monkeypatch.setattr(config, "TAVILY_API_KEY", "test-key")
+    monkeypatch.setattr(config, "SEARCH_BATCH_CONCURRENCY", 1)
+    monkeypatch.setattr(config, "REQUEST_TIMEOUT_MS", 300)
+    seen = []
+
+    async def fake_search(query, *, deadline, **kwargs):
+        seen.append(deadline.remaining())
+        if deadline.remaining() < ITEM_SEC:
+            raise DeadlineExceeded()
+        await asyncio.sleep(ITEM_SEC)
+        result = SearchResult(id="r", url="https://a.example/", title="T", snippet="s", score=0.5, rank=1)
+        return SearchFlowResult(results=[result], reranked=False, ranker="local")
+
+    monkeypatch.setattr(search, "run_search_async", fake_search)
+    return seen
+
+
+def _batch(headers=None):
+    body = {"queries": [{"q": f"query {i}"} for i in range(5)]}
+    return TestClient(main.app).post("/search/batch", json=body, headers=headers or {})
+
+
+def test_queued_items_get_a_full_budget(budgets):
+    # 5 items back to back take longer than one request timeout; none is starved
+    r = _batch()
+    assert r.status_code == 200
+    assert [item["status"] for item in r.json()["results"]] == [200] * 5
+    assert min(budgets) > 0.25
+
+
+def test_request_timeout_caps_the_whole_batch(budgets):
+    r = _batch({"X-Request-Timeout-Ms": "250"})
+    statuses = [item["status"] for item in r.json()["results"]]
+    assert statuses[:2] == [200, 200]
+    assert statuses[-1] == 504
+    assert all(b <= 0.25 for b in budgets)
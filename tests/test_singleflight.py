@@ -0,0 +1,127 @@
+"""Single-flight coalescing must not let one caller's deadline fail another caller."""
+import asyncio
+
+import pytest
+
+import config
+from services import search_flow
+from utils.deadline import Deadline, DeadlineExceeded
+from utils.singleflight import SingleFlight
+
+UPSTREAM_SEC = 0.3
+
+
+async def _slow(deadline: Deadline | None, result="ok"):
+    """Upstream that takes UPSTREAM_SEC and gives up at the deadline it runs under."""
+    await asyncio.sleep(min(UPSTREAM_SEC, deadline.remaining()) if deadline else UPSTREAM_SEC)
+    if deadline is not None and deadline.expired:
+        raise DeadlineExceeded()
+    return result
+
+
+def test_identical_calls_coalesce():
+    flight = SingleFlight("test")
+
+    async def main():
+        deadline = Deadline(5)
+        return await asyncio.gather(*(flight.do("k", lambda: _slow(deadline), deadline=deadline) for _ in range(3)))
+
+    assert asyncio.run(main()) == ["ok", "ok", "ok"]
+    assert flight.stats()["executed"] == 1
+    assert flight.stats()["coalesced"] == 2
+
+
+def test_requests_with_own_default_deadlines_coalesce():
+    """Each request makes its own Deadline, a few ms after the previous one."""
+    flight = SingleFlight("test")
+
+    async def caller():
+        deadline = Deadline(config.REQUEST_TIMEOUT_MS / 1000)
+        return await flight.do("k", lambda: _slow(deadline), deadline=deadline)
+
+    async def main():
+        tasks = []
+        for _ in range(10):
+            tasks.append(asyncio.ensure_future(caller()))
+            await asyncio.sleep(0.005)
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(main()) == ["ok"] * 10
+    stats = flight.stats()
+    assert stats["executed"] == 1 and stats["coalesced"] == 9 and stats["deadline_splits"] == 0
+
+
+def test_short_deadline_caller_does_not_fail_longer_caller():
+    flight = SingleFlight("test")
+
+    async def main():
+        short, long = Deadline(0.05), Deadline(5)
+        first = asyncio.ensure_future(flight.do("k", lambda: _slow(short), deadline=short))
+        await asyncio.sleep(0)  # the short caller starts the flight
+        second = asyncio.ensure_future(flight.do("k", lambda: _slow(long), deadline=long))
+        return await asyncio.gather(first, second, return_exceptions=True)
+
+    first, second = asyncio.run(main())
+    assert isinstance(first, DeadlineExceeded)
+    assert second == "ok"
+    assert flight.stats()["deadline_splits"] == 1
+
+
+def test_short_caller_joining_long_flight_times_out_alone():
+    flight = SingleFlight("test")
+
+    async def main():
+        short, long = Deadline(0.05), Deadline(5)
+        first = asyncio.ensure_future(flight.do("k", lambda: _slow(long), deadline=long))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(flight.do("k", lambda: _slow(short), deadline=short))
+        return await asyncio.gather(first, second, return_exceptions=True)
+
+    first, second = asyncio.run(main())
+    assert first == "ok"
+    assert isinstance(second, DeadlineExceeded)
+    stats = flight.stats()
+    assert stats["executed"] == 1 and stats["coalesced"] == 1 and stats["cancelled"] == 0
+
+
+def test_run_search_async_isolates_deadlines(monkeypatch):
+    """Reproduction: same /search query, one client with a 100 ms budget, one with the default."""
+    monkeypatch.setattr(config, "TAVILY_API_KEY", "test-key")
+    monkeypatch.setattr(search_flow, "search_flight", SingleFlight("search"))
+    calls = []
+
+    async def fake_tavily(api_key, query, *, deadline=None, **kwargs):
+        calls.append(deadline)
+        await _slow(deadline)
+        return {"results": [{"url": "https://a.example/x", "title": "Alpha", "content": "alpha beta gamma", "score": 0.5}]}
+
+    monkeypatch.setattr(search_flow, "tavily_search_async", fake_tavily)
+
+    async def main():
+        short = asyncio.ensure_future(search_flow.run_search_async("same", deadline=Deadline(0.1)))
+        await asyncio.sleep(0)
+        default = asyncio.ensure_future(
+            search_flow.run_search_async("same", deadline=Deadline(config.REQUEST_TIMEOUT_MS / 1000))
+        )
+        return await asyncio.gather(short, default, return_exceptions=True)
+
+    short, default = asyncio.run(main())
+    assert isinstance(short, DeadlineExceeded)
+    assert not isinstance(default, Exception)
+    assert [r.url for r in default.results] == ["https://a.example/x"]
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("reserve", [0.0, 5.0])
+def test_reserve_is_part_of_search_key(monkeypatch, reserve):
+    monkeypatch.setattr(config, "TAVILY_API_KEY", "test-key")
+    monkeypatch.setattr(search_flow, "search_flight", SingleFlight("search"))
+    seen = []
+
+    async def fake_flight_do(key, fn, *, deadline=None):
+        seen.append(key)
+        return None
+
+    monkeypatch.setattr(search_flow.search_flight, "do", fake_flight_do)
+    asyncio.run(search_flow.run_search_async("q", reserve_sec=reserve))
+    assert seen[0][-1] == reserve
@@ -0,0 +1,221 @@
+"""SQLite store: write-behind flushing, listing over unflushed changes, versions on disk."""
+import threading
+
+import pytest
+
+from store.base import decode_cursor, encode_cursor, order_key
+from store.sqlite import SQLiteStore
+
+
+def _open(path) -> SQLiteStore:
+    # The flusher never fires on its own: tests flush explicitly
+    return SQLiteStore(str(path), cache_size=100, flush_interval=3600, flush_batch=10**6)
+
+
+def _message(n: int) -> dict:
+    return {"id": f"m{n}", "query": f"q{n}", "answer": f"a{n}", "created_at": f"2026-01-01T00:00:{n:02d}Z"}
+
+
+def _created(n: int) -> str:
+    return f"2026-01-{n + 1:02d}T00:00:00Z"
+
+
+@pytest.fixture
+def db(tmp_path):
+    return tmp_path / "conversations.db"
+
+
+@pytest.fixture
+def store(db):
+    s = _open(db)
+    yield s
+    s.close()
+
+
+def _ids(items: list[dict]) -> list[str]:
+    return [item["id"] for item in items]
+
+
+def test_close_persists_everything(db):
+    s = _open(db)
+    s.create("c1", _created(1))
+    s.append_message("c1", _message(1))
+    s.append_message("c1", _message(2))
+    s.set_summary("c1", "summary", "m1")
+    s.create("c2", _created(2))
+    s.delete("c2")
+    version = s.version("c1")
+    s.close()
+
+    s = _open(db)
+    try:
+        conv = s.get("c1")
+        assert [m.id for m in conv["messages"]] == ["m1", "m2"]
+        assert conv["message_count"] == 2
+        assert (conv["summary"], conv["summary_through"]) == ("summary", "m1")
+        assert conv["version"] == version
+        assert s.get("c2") is None
+        assert s.list_page(1, 10)[1] == 1
+    finally:
+        s.close()
+
+
+def test_version_reads_the_column_without_loading(db):
+    s = _open(db)
+    s.create("c1", _created(1))
+    s.append_message("c1", _message(1))
+    version = s.version("c1")
+    s.close()
+
+    s = _open(db)
+    try:
+        assert s.version("c1") == version
+        assert s.version("missing") is None
+        assert s.misses == 0 and not s._cache
+        # New writes after a restart still move the version forward
+        s.append_message("c1", _message(2))
+        assert s.version("c1") > version
+    finally:
+        s.close()
+
+
+def test_version_of_unflushed_delete_is_none(store):
+    store.create("c1", _created(1))
+    store.flush()
+    store.delete("c1")
+    assert store.version("c1") is None
+
+
+def test_lists_merge_unflushed_creates_and_deletes(store):
+    for n in range(6):
+        store.create(f"c{n}", _created(n))
+    store.flush()
+    store.delete("c4")
+    store.delete("c1")
+    store.create("c6", _created(6))
+    store.create("c7", "2026-01-03T12:00:00Z")  # lands between flushed rows
+    store.append_message("c2", _message(1))
+
+    expected = ["c6", "c5", "c3", "c7", "c2", "c0"]
+    items, total = store.list_page(1, 10)
+    assert _ids(items) == expected and total == 6
+    assert [item["message_count"] for item in items if item["id"] == "c2"] == [1]
+    assert _ids(store.list_page(2, 4)[0]) == expected[4:]
+
+    # Keyset walk over the same overlay visits every conversation once, in order
+    seen, after = [], None
+    while True:
+        items, _ = store.list_after(after, 2)
+        if not items:
+            break
+        seen += _ids(items)
+        after = decode_cursor(encode_cursor(order_key(items[-1])))
+    assert seen == expected
+
+    store.flush()
+    assert _ids(store.list_page(1, 10)[0]) == expected
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(("2026-01-01", "c1"))[:-2])
+
+
+def test_reads_and_writes_proceed_while_flush_writes(store, db, monkeypatch):
+    store.create("c1", _created(1))
+    store.append_message("c1", _message(1))
+    writing, release = threading.Event(), threading.Event()
+    write = store._write
+
+    def slow_write(rewrites, appended):
+        writing.set()
+        assert release.wait(5)
+        write(rewrites, appended)
+
+    monkeypatch.setattr(store, "_write", slow_write)
+    flusher = threading.Thread(target=store.flush)
+    flusher.start()
+    try:
+        assert writing.wait(5)
+        # The batch is being written: it is still served from memory, and new writes queue up
+        assert [m.id for m in store.get("c1")["messages"]] == ["m1"]
+        assert _ids(store.list_page(1, 10)[0]) == ["c1"]
+        assert store.append_message("c1", _message(2))
+    finally:
+        release.set()
+        flusher.join(5)
+    monkeypatch.setattr(store, "_write", write)
+    store.flush()
+
+    reopened = _open(db)
+    try:
+        assert [m.id for m in reopened.get("c1")["messages"]] == ["m1", "m2"]
+    finally:
+        reopened.close()
+
+
+def test_failed_flush_is_retried_without_duplicate_rows(store, db, monkeypatch):
+    store.create("c1", _created(1))
+    store.append_message("c1", _message(1))
+    write = store._write
+
+    def failing_write(rewrites, appended):
+        # A turn lands while the doomed batch is on its way to disk
+        store.append_message("c1", _message(2))
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "_write", failing_write)
+    with pytest.raises(OSError):
+        store.flush()
+    monkeypatch.setattr(store, "_write", write)
+    assert [m.id for m in store.get("c1")["messages"]] == ["m1", "m2"]
+    store.flush()
+
+    reopened = _open(db)
+    try:
+        conv = reopened.get("c1")
+        assert [m.id for m in conv["messages"]] == ["m1", "m2"]
+        assert conv["message_count"] == 2
+    finally:
+        reopened.close()
+
+
+def test_slow_disk_load_does_not_block_other_conversations(db, monkeypatch):
+    store = _open(db)
+    store.create("cold", _created(1))
+    store.close()
+    store = _open(db)
+    hot = next(f"hot{n}" for n in range(1000) if store._stripes(f"hot{n}") is not store._stripes("cold"))
+    store.create(hot, _created(2))
+    loading, release = threading.Event(), threading.Event()
+    load = store._load
+
+    def slow_load(conversation_id):
+        loading.set()
+        release.wait(5)
+        return load(conversation_id)
+
+    def other_conversation():
+        assert store.append_message(hot, _message(1))
+        done.append(store.get(hot)["message_count"])
+        done.append(store.version(hot) is not None)
+        done.append(hot in _ids(store.list_page(1, 10)[0]))
+
+    monkeypatch.setattr(store, "_load", slow_load)
+    done = []
+    reader = threading.Thread(target=store.get, args=("cold",))
+    reader.start()
+    try:
+        assert loading.wait(5)
+        # "cold" is being read from disk; other conversations and the listing carry on
+        worker = threading.Thread(target=other_conversation)
+        worker.start()
+        worker.join(2)
+        assert not worker.is_alive()
+        assert done == [1, True, True]
+    finally:
+        release.set()
+        reader.join(5)
+        store.close()
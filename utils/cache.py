@@ -0,0 +1,82 @@
+"""Bounded in-process TTL + LRU cache with hit/miss/eviction counters.
+
+Used in front of upstream calls (Tavily search, Cohere scores, answers) so repeated
+queries skip the network. Thread-safe: the sync and async pipelines share instances.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+def normalize_query(query: str) -> str:
+    """Cache-key form of a query: casefolded, whitespace collapsed."""
+    return re.sub(r"\s+", " ", (query or "").strip()).casefold()
+
+
+class TTLCache:
+    """LRU cache with a per-entry TTL and a cap on entries.
+
+    get() returns None on a miss or an expired entry; set() evicts the least
+    recently used entries when over max_entries. A max_entries of 0 disables caching.
+    """
+
+    def __init__(self, name: str, max_entries: int, default_ttl: float) -> None:
+        self.name = name
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        if self.max_entries <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Counters for /health: size, hits, misses, evictions, expirations, hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
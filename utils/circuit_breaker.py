@@ -0,0 +1,188 @@
+"""Per-provider circuit breakers: fail fast while an upstream is erroring or too slow.
+
+closed    → calls pass; outcomes recorded in a sliding window. Opens when the share of
+            failed or slow calls reaches the threshold (after min_calls outcomes).
+open      → calls raise CircuitOpenError immediately, until open_sec has passed.
+half_open → a few trial calls pass; all succeeding closes the breaker, any failing reopens it.
+
+Failures are upstream errors only (5xx, 429, timeouts/transport errors); 4xx responses
+are the caller's problem and count as successes.
+
+Callers put the breaker inside the retry loop (utils.retry), around each attempt: every
+attempt is one outcome, timed on its own, so backoff sleeps between attempts never count
+as slow calls, and a breaker that opens mid-retry stops the remaining attempts.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+import config
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(f"{name} temporarily unavailable (circuit open)")
+        self.name = name
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """True for errors that say the upstream is unhealthy (not bad input)."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        code = exc.response.status_code
+        return code >= 500 or code == 429
+    return isinstance(exc, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """Error-rate and latency driven breaker. Thread-safe; shared by sync and async paths."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_rate: float,
+        slow_call_sec: float,
+        window: int,
+        min_calls: int,
+        open_sec: float,
+        half_open_calls: int,
+    ) -> None:
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_sec = slow_call_sec
+        self.min_calls = min_calls
+        self.open_sec = open_sec
+        self.half_open_calls = half_open_calls
+        self._outcomes: deque[bool] = deque(maxlen=window)  # True = failed or slow
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials = 0
+        self._trial_successes = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_sec:
+                return HALF_OPEN
+            return self._state
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError if the call must not go upstream."""
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_sec:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name)
+                self._state = HALF_OPEN
+                self._trials = 0
+                self._trial_successes = 0
+            if self._state == HALF_OPEN:
+                if self._trials >= self.half_open_calls:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name)
+                self._trials += 1
+
+    def record(self, ok: bool, latency: float) -> None:
+        bad = not ok or latency > self.slow_call_sec
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if bad:
+                    self._open()
+                    return
+                self._trial_successes += 1
+                if self._trial_successes >= self.half_open_calls:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                return
+            if self._state == OPEN:
+                return
+            self._outcomes.append(bad)
+            if len(self._outcomes) >= self.min_calls:
+                if sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                    self._open()
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.opened += 1
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """Run fn() through the breaker."""
+        self.before_call()
+        start = time.monotonic()
+        try:
+            result = fn()
+        except Exception as e:
+            self.record(not is_upstream_failure(e), time.monotonic() - start)
+            raise
+        self.record(True, time.monotonic() - start)
+        return result
+
+    async def call_async(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn() through the breaker. Cancellation records no outcome."""
+        self.before_call()
+        start = time.monotonic()
+        try:
+            result = await fn()
+        except Exception as e:
+            self.record(not is_upstream_failure(e), time.monotonic() - start)
+            raise
+        except BaseException:
+            # Cancelled: release a half-open trial slot without judging the upstream
+            with self._lock:
+                if self._state == HALF_OPEN and self._trials > 0:
+                    self._trials -= 1
+            raise
+        self.record(True, time.monotonic() - start)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            failures = sum(self._outcomes)
+            recorded = len(self._outcomes)
+        return {
+            "state": self.state,
+            "failure_rate": round(failures / recorded, 4) if recorded else 0.0,
+            "window_calls": recorded,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+def _breaker(name: str, slow_call_sec: float) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        failure_rate=config.BREAKER_FAILURE_RATE,
+        slow_call_sec=slow_call_sec,
+        window=config.BREAKER_WINDOW,
+        min_calls=config.BREAKER_MIN_CALLS,
+        open_sec=config.BREAKER_OPEN_SEC,
+        half_open_calls=config.BREAKER_HALF_OPEN_CALLS,
+    )
+
+
+# One breaker per upstream; slow-call thresholds sit well under each stage's timeout
+breakers: dict[str, CircuitBreaker] = {
+    "tavily_search": _breaker("tavily_search", config.BREAKER_SLOW_CALL_SEC),
+    "tavily_extract": _breaker("tavily_extract", config.BREAKER_SLOW_CALL_SEC),
+    "cohere": _breaker("cohere", config.BREAKER_SLOW_CALL_SEC),
+    "gemini": _breaker("gemini", config.BREAKER_GEMINI_SLOW_CALL_SEC),
+}
+
+
+def breaker_states() -> dict:
+    """Breaker state and counters for /health."""
+    return {name: b.stats() for name, b in breakers.items()}
@@ -0,0 +1,216 @@
+"""Response compression negotiated from Accept-Encoding (pure ASGI middleware).
+
+- Encodings: zstd and br when the zstandard / brotli packages are installed, gzip always.
+  The client's q-values decide; on a tie the server prefers zstd, then br, then gzip.
+- Only text-like bodies (JSON, NDJSON, SSE, HTML, ...) are compressed, and only when the
+  response has no Content-Encoding already.
+- Complete bodies under COMPRESSION_MIN_BYTES are sent as-is. Streamed bodies (size
+  unknown up front) are compressed chunk by chunk, flushing after each chunk so SSE
+  events and NDJSON lines reach the client without waiting for more output.
+- CPU time spent compressing is counted per encoding (compression_stats(), on /health)
+  so levels can be tuned against the bytes saved.
+"""
+import time
+import zlib
+from typing import Callable, Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import config
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install zstandard
+    zstandard = None
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+COMPRESSIBLE_TYPES = frozenset({
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+})
+
+
+class _Encoder(Protocol):
+    """One response's compressor: compress(chunk, final) returns the bytes to send."""
+
+    def compress(self, data: bytes, final: bool) -> bytes: ...
+
+
+class _GzipEncoder:
+    def __init__(self) -> None:
+        self._z = zlib.compressobj(config.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._z.compress(data) + self._z.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliEncoder:
+    def __init__(self) -> None:
+        self._c = brotli.Compressor(quality=config.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._c.process(data) + (self._c.finish() if final else self._c.flush())
+
+
+class _ZstdEncoder:
+    def __init__(self) -> None:
+        self._c = zstandard.ZstdCompressor(level=config.COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        mode = zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._c.compress(data) + self._c.flush(mode)
+
+
+# Server preference order (best ratio per CPU first)
+ENCODERS: dict[str, Callable[[], _Encoder]] = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = _ZstdEncoder
+if brotli is not None:
+    ENCODERS["br"] = _BrotliEncoder
+ENCODERS["gzip"] = _GzipEncoder
+
+
+class _EncodingStats:
+    __slots__ = ("responses", "streamed", "bytes_in", "bytes_out", "cpu_ns")
+
+    def __init__(self) -> None:
+        self.responses = 0
+        self.streamed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_ns = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "responses": self.responses,
+            "streamed": self.streamed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+            "cpu_ms": round(self.cpu_ns / 1e6, 1),
+            "cpu_us_per_kb": round(self.cpu_ns / 1e3 / (self.bytes_in / 1024), 1) if self.bytes_in else None,
+        }
+
+
+_stats = {name: _EncodingStats() for name in ENCODERS}
+_skipped_small = 0
+
+
+def compression_stats() -> dict:
+    """Settings and per-encoding counters (CPU time is thread CPU time spent in compressors)."""
+    return {
+        "enabled": config.COMPRESSION_ENABLED,
+        "min_bytes": config.COMPRESSION_MIN_BYTES,
+        "levels": {"gzip": config.COMPRESSION_GZIP_LEVEL, "zstd": config.COMPRESSION_ZSTD_LEVEL, "br": config.COMPRESSION_BROTLI_QUALITY},
+        "skipped_small": _skipped_small,
+        "encodings": {name: s.to_dict() for name, s in _stats.items()},
+    }
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """Best available encoding for an Accept-Encoding header, or None for identity."""
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, *params = item.strip().split(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for name in ENCODERS:  # preference order breaks ties
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def _compressible(headers: MutableHeaders) -> bool:
+    if "content-encoding" in headers:
+        return False
+    media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES or media_type.endswith("+json")
+
+
+class CompressionMiddleware:
+    """Compress response bodies with the encoding negotiated from Accept-Encoding."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not config.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start: Message | None = None
+        encoder: _Encoder | None = None
+        passthrough = False
+
+        def compress(stats: _EncodingStats, data: bytes, final: bool) -> bytes:
+            began = time.thread_time_ns()
+            out = encoder.compress(data, final)
+            stats.cpu_ns += time.thread_time_ns() - began
+            stats.bytes_in += len(data)
+            stats.bytes_out += len(out)
+            return out
+
+        async def compressing_send(message: Message) -> None:
+            nonlocal start, encoder, passthrough
+            global _skipped_small
+            if message["type"] == "http.response.start":
+                start = message  # held until the first body chunk shows the size
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if encoder is None:
+                headers = MutableHeaders(scope=start)
+                compressible = start["status"] not in (204, 304) and _compressible(headers)
+                if compressible:
+                    headers.add_vary_header("Accept-Encoding")
+                declared = headers.get("content-length")
+                small = (not more and len(body) < config.COMPRESSION_MIN_BYTES) or (
+                    more and declared is not None and declared.isdigit() and int(declared) < config.COMPRESSION_MIN_BYTES
+                )
+                if not compressible or encoding is None or small:
+                    if compressible and encoding is not None:
+                        _skipped_small += 1
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                encoder = ENCODERS[encoding]()
+                stats = _stats[encoding]
+                stats.responses += 1
+                headers["Content-Encoding"] = encoding
+                if more:
+                    stats.streamed += 1
+                    del headers["content-length"]
+                    await send(start)
+                else:
+                    body = compress(stats, body, final=True)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+            out = compress(_stats[encoding], body, final=not more)
+            await send({"type": "http.response.body", "body": out, "more_body": more})
+
+        await self.app(scope, receive, compressing_send)
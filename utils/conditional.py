@@ -0,0 +1,37 @@
+"""Conditional GET: ETags from store version tags, and 304 Not Modified on If-None-Match.
+
+ETags are weak (W/"..."): compact and pretty JSON, and compressed and plain bodies,
+of the same version are the same data, so one tag covers every representation.
+Cache-Control: no-cache lets browsers and proxies keep the body but revalidate it on
+every use, which is what polling clients need.
+"""
+from fastapi import Request
+from fastapi.responses import Response
+
+CACHE_CONTROL = "no-cache"
+
+
+def weak_etag(tag: str) -> str:
+    return f'W/"{tag}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match lists etag (weak comparison) or is "*"."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    opaque = etag.removeprefix("W/")
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def validator_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    """304 with the validators and no body."""
+    return Response(status_code=304, headers=validator_headers(etag))
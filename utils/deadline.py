@@ -0,0 +1,101 @@
+"""Request-level deadlines propagated through search, rerank and synthesis.
+
+A Deadline is created per request from the X-Request-Timeout-Ms header (or
+REQUEST_TIMEOUT_MS) and passed down the pipeline. Each upstream stage gets
+min(stage timeout, time remaining), retries never sleep past it, and optional
+stages (Cohere rerank) are skipped when too little time is left.
+"""
+import time
+
+import httpx
+from fastapi import Header
+
+import config
+
+DEADLINE_ERROR = {"error": "Request deadline exceeded", "code": "DEADLINE_EXCEEDED"}
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before a stage could start or finish."""
+
+    def __init__(self) -> None:
+        super().__init__("Request deadline exceeded")
+
+
+class Deadline:
+    """Absolute point in time.monotonic() by which the request must finish."""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, timeout_sec: float) -> None:
+        self.expires_at = time.monotonic() + timeout_sec
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def reserve(self, seconds: float) -> "Deadline":
+        """Earlier deadline that leaves `seconds` for later stages (e.g. rerank before synthesis)."""
+        earlier = Deadline(0)
+        earlier.expires_at = self.expires_at - seconds
+        return earlier
+
+
+def stage_timeout(deadline: Deadline | None, cap: float) -> float:
+    """Timeout for one upstream stage: its own cap, or less if the deadline is closer."""
+    if deadline is None:
+        return cap
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded()
+    return min(cap, remaining)
+
+
+def expires_at(deadline: Deadline | None) -> float | None:
+    """Monotonic expiry for utils.retry, or None without a deadline."""
+    return deadline.expires_at if deadline is not None else None
+
+
+def raise_if_expired(deadline: Deadline | None, exc: httpx.TimeoutException) -> None:
+    """Turn a timeout caused by our own deadline into DeadlineExceeded (not an upstream fault)."""
+    if deadline is not None and deadline.expired:
+        raise DeadlineExceeded() from exc
+
+
+def is_deadline_error(exc: Exception, deadline: Deadline | None) -> bool:
+    """True when exc means the request ran out of time rather than an upstream failure."""
+    if isinstance(exc, DeadlineExceeded):
+        return True
+    return isinstance(exc, httpx.TimeoutException) and deadline is not None and deadline.expired
+
+
+def request_deadline(
+    x_request_timeout_ms: int | None = Header(
+        None,
+        ge=1,
+        description="Time budget for this request in ms (default REQUEST_TIMEOUT_MS, capped at REQUEST_TIMEOUT_MAX_MS)",
+    ),
+) -> Deadline:
+    """FastAPI dependency: the request's Deadline from X-Request-Timeout-Ms or the server default."""
+    timeout_ms = x_request_timeout_ms or config.REQUEST_TIMEOUT_MS
+    return Deadline(min(timeout_ms, config.REQUEST_TIMEOUT_MAX_MS) / 1000)
+
+
+def batch_deadline(
+    x_request_timeout_ms: int | None = Header(
+        None,
+        ge=1,
+        description="Time budget for the whole batch in ms (default SEARCH_BATCH_TIMEOUT_MS)",
+    ),
+) -> Deadline:
+    """FastAPI dependency for POST /search/batch: one deadline for the whole batch."""
+    timeout_ms = x_request_timeout_ms or config.SEARCH_BATCH_TIMEOUT_MS
+    return Deadline(min(timeout_ms, max(config.REQUEST_TIMEOUT_MAX_MS, config.SEARCH_BATCH_TIMEOUT_MS)) / 1000)
+
+
+def item_deadline(batch: Deadline) -> Deadline:
+    """Budget for one item of a batch, starting now: REQUEST_TIMEOUT_MS, capped by the batch deadline."""
+    return Deadline(min(config.REQUEST_TIMEOUT_MS / 1000, batch.remaining()))
@@ -0,0 +1,123 @@
+"""Hedged async requests: send a backup copy of a slow call and take whichever finishes first.
+
+The hedge delay adapts to the observed latency (a running percentile, clamped to
+[min_delay, max_delay]), and hedges are capped at max_rate of calls so the extra
+upstream cost stays bounded.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies (seconds) with percentile lookup."""
+
+    def __init__(self, window: int = 200) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> float | None:
+        """Nearest-rank percentile of the window; None when empty."""
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        idx = max(0, min(len(ordered) - 1, round(p / 100.0 * (len(ordered) - 1))))
+        return ordered[idx]
+
+
+class Hedger:
+    """Runs a coroutine factory, firing one hedge copy if the first attempt is slower than the threshold."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        enabled: bool,
+        max_rate: float,
+        percentile: float,
+        min_delay: float,
+        max_delay: float,
+        min_samples: int = 20,
+        window: int = 200,
+    ) -> None:
+        self.name = name
+        self.enabled = enabled
+        self.max_rate = max_rate
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.latency = LatencyTracker(window)
+        self.calls = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.hedges_suppressed = 0
+
+    def delay(self) -> float:
+        """Seconds to wait before hedging: running percentile, or max_delay until warmed up."""
+        if len(self.latency) < self.min_samples:
+            return self.max_delay
+        observed = self.latency.percentile(self.percentile) or self.max_delay
+        return min(self.max_delay, max(self.min_delay, observed))
+
+    def _may_hedge(self) -> bool:
+        return self.hedges_fired + 1 <= self.max_rate * self.calls
+
+    async def run(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn(); after delay() without a result, race a second fn() and cancel the loser."""
+        if not self.enabled:
+            return await fn()
+        self.calls += 1
+        start = time.monotonic()
+        primary = asyncio.ensure_future(fn())
+        hedge: asyncio.Future | None = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.delay())
+            if not done and not self._may_hedge():
+                self.hedges_suppressed += 1
+            elif not done:
+                hedge_start = time.monotonic()
+                hedge = asyncio.ensure_future(fn())
+                self.hedges_fired += 1
+                pending = {primary, hedge}
+                first_error: BaseException | None = None
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is not None:
+                            first_error = first_error or task.exception()
+                            continue
+                        if task is hedge:
+                            self.hedges_won += 1
+                            self.latency.record(time.monotonic() - hedge_start)
+                        else:
+                            self.latency.record(time.monotonic() - start)
+                        return task.result()
+                raise first_error
+            result = await primary
+            self.latency.record(time.monotonic() - start)
+            return result
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "calls": self.calls,
+            "hedges_fired": self.hedges_fired,
+            "hedges_won": self.hedges_won,
+            "hedges_suppressed": self.hedges_suppressed,
+            "delay_ms": round(self.delay() * 1000, 1),
+        }
@@ -0,0 +1,95 @@
+"""Pure ASGI middleware: request IDs and request body size limits.
+
+Plain ASGI callables instead of BaseHTTPMiddleware, which runs every request through
+an extra task and memory stream (overhead per request, and known to interfere with
+streaming responses and background tasks). These only wrap receive/send.
+"""
+import uuid
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.exceptions import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.responses import PrettyJSONResponse
+
+PAYLOAD_TOO_LARGE_ERROR = {"error": "Request body too large", "code": "PAYLOAD_TOO_LARGE"}
+
+
+class RequestIDMiddleware:
+    """Set X-Request-ID on request (scope state) and response for tracing."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = Headers(scope=scope).get("x-request-id") or str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id  # request.state.request_id
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        await self.app(scope, receive, send_with_id)
+
+
+class BodySizeLimitMiddleware:
+    """Reject request bodies over max_bytes with 413 PAYLOAD_TOO_LARGE.
+
+    A Content-Length over the limit is rejected before the app runs. Otherwise (chunked
+    uploads, or a Content-Length that understates the body) bytes are counted as the app
+    reads them: past the limit, receive raises so the app stops reading, and whatever
+    error response the app produces for that is replaced with the 413.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length:
+            try:
+                if int(content_length) > self.max_bytes:
+                    await PrettyJSONResponse(status_code=413, content=PAYLOAD_TOO_LARGE_ERROR)(scope, receive, send)
+                    return
+            except ValueError:
+                pass
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise HTTPException(status_code=413, detail=PAYLOAD_TOO_LARGE_ERROR["error"])
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_started
+            if exceeded and not response_started:
+                # The app's response to the aborted read; the 413 below is sent instead
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            # Raised out of the app by the aborted read (e.g. a route reading the body itself)
+            if not exceeded:
+                raise
+        if exceeded and not response_started:
+            await PrettyJSONResponse(status_code=413, content=PAYLOAD_TOO_LARGE_ERROR)(scope, receive, send)
@@ -1,19 +1,79 @@
-"""Pretty-printed JSON response for readable API output.
+"""JSON response used as response_class on every route: compact by default, pretty on request.
 
-Used as response_class on routes so /docs and curl get readable JSON.
+Compact output uses orjson when installed (stdlib json otherwise). Clients that want
+readable output (curl, browsers) ask for it with ?pretty=true or an Accept parameter,
+e.g. `Accept: application/json; pretty=true` or `Accept: application/json; indent=2`.
+The choice is made per request by the output_format dependency (installed app-wide)
+and carried to render() in a context variable.
 """
 import json
+from contextvars import ContextVar
+from typing import Mapping
+
+from fastapi import Query, Request
 from fastapi.responses import JSONResponse
+from starlette.background import BackgroundTask
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+_pretty: ContextVar[bool] = ContextVar("pretty_json", default=False)
+
+
+def wants_pretty(request: Request) -> bool:
+    """True if the request asks for indented JSON (?pretty=true or an Accept pretty/indent parameter)."""
+    if request.query_params.get("pretty", "").strip().lower() in ("1", "true", "yes"):
+        return True
+    for media_range in request.headers.get("accept", "").split(","):
+        for param in media_range.split(";")[1:]:
+            name, _, value = param.partition("=")
+            name, value = name.strip().lower(), value.strip().strip('"').lower()
+            if (name == "pretty" and value in ("1", "true", "yes")) or (name == "indent" and value not in ("", "0")):
+                return True
+    return False
+
+
+async def output_format(
+    request: Request,
+    pretty: bool = Query(False, description="Indent the JSON response for readability"),
+) -> None:
+    """App-wide dependency: record whether this request wants pretty JSON.
+
+    Async on purpose: it runs in the request's own context, so the endpoint (and the
+    response rendered from its return value) sees the value.
+    """
+    _pretty.set(pretty or wants_pretty(request))
+
+
+def render_json(content, *, pretty: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON: compact, or 2-space indented."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, option=orjson.OPT_INDENT_2 if pretty else 0)
+        except TypeError:
+            pass  # types orjson rejects (e.g. int beyond 64 bits): stdlib handles them
+    if pretty:
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=2, separators=(", ", ": ")).encode("utf-8")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
 
 
 class PrettyJSONResponse(JSONResponse):
-    """JSON response with 2-space indent; UTF-8, no NaN."""
+    """JSON response; UTF-8. Compact unless the request opted into pretty output (or pretty=True is passed)."""
+
+    def __init__(
+        self,
+        content=None,
+        status_code: int = 200,
+        headers: Mapping[str, str] | None = None,
+        media_type: str | None = None,
+        background: BackgroundTask | None = None,
+        *,
+        pretty: bool | None = None,
+    ) -> None:
+        self._pretty_output = _pretty.get() if pretty is None else pretty
+        super().__init__(content, status_code, headers, media_type, background)
 
     def render(self, content) -> bytes:
-        return json.dumps(
-            content,
-            ensure_ascii=False,
-            allow_nan=False,
-            indent=2,
-            separators=(", ", ": "),
-        ).encode("utf-8")
+        return render_json(content, pretty=self._pretty_output)
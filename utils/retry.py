@@ -1,39 +1,171 @@
-"""Retry HTTP calls on 429/503/500 with backoff."""
+"""Retry HTTP calls on 429/503/500 with backoff. Sync and async variants share one policy.
+
+- Waits honor the upstream Retry-After header; otherwise exponential backoff with jitter.
+- Total retry time per call is capped (RETRY_MAX_TOTAL_SEC, or an earlier caller deadline):
+  a retry whose wait would overrun the cap is not attempted.
+- A process-wide retry budget limits retries to a fraction of calls (RETRY_BUDGET_RATIO),
+  so upstream outages are not amplified by retry storms.
+"""
+import asyncio
+import random
+import threading
 import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 
 import httpx
 
+import config
+
 RETRY_STATUSES = (429, 503, 500)
 MAX_ATTEMPTS_429 = 2  # 429 = rate limit: only 1 retry so we don't send 4 requests per message
-MAX_ATTEMPTS_OTHER = 3  # 503/500: retry twice (1s, 2s) for transient errors
-BACKOFF_429_SEC = 20
+MAX_ATTEMPTS_OTHER = 3  # 503/500: retry twice (~1s, ~2s) for transient errors
+BACKOFF_429_SEC = 20  # 429 without Retry-After
+BACKOFF_BASE_SEC = 1.0
+
+
+class RetryBudget:
+    """Token bucket shared by all upstream calls: each call earns `ratio` tokens, each retry spends one.
+
+    A small per-second allowance (min_per_sec) keeps retries possible at low traffic.
+    Thread-safe; the sync and async paths share one instance.
+    """
+
+    def __init__(self, ratio: float, min_per_sec: float, max_tokens: float = 10.0) -> None:
+        self.ratio = ratio
+        self.min_per_sec = min_per_sec
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.rejected = 0
 
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._last) * self.min_per_sec)
+        self._last = now
 
-def retry_http(fn):
+    def record_call(self) -> None:
+        """Count one first attempt; deposits `ratio` tokens."""
+        with self._lock:
+            self.calls += 1
+            self._refill(time.monotonic())
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        """Spend one token for a retry. False when the budget is exhausted."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self.retries += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "rejected": self.rejected,
+                "tokens": round(self._tokens, 2),
+            }
+
+
+retry_budget = RetryBudget(config.RETRY_BUDGET_RATIO, config.RETRY_BUDGET_MIN_PER_SEC)
+
+
+def retry_http(fn, *, deadline: float | None = None):
     """
     Call fn(). On httpx.HTTPStatusError:
-    - 429: retry at most once after BACKOFF_429_SEC (2 attempts total).
-    - 503/500: retry up to MAX_ATTEMPTS_OTHER with 1s, 2s backoff.
-    Re-raise after last attempt or on other statuses.
+    - 429: retry at most once, after Retry-After or BACKOFF_429_SEC (2 attempts total).
+    - 503/500: retry up to MAX_ATTEMPTS_OTHER with jittered ~1s, ~2s backoff.
+    Re-raise after last attempt, on other statuses, when the wait would pass the
+    deadline (time.monotonic() value), or when the retry budget is exhausted.
     """
-    last = None
+    cutoff = _cutoff(deadline)
+    retry_budget.record_call()
     attempt = 0
     while True:
         try:
             return fn()
         except httpx.HTTPStatusError as e:
-            last = e
-            code = e.response.status_code
-            if code not in RETRY_STATUSES:
+            delay = _retry_delay(e, attempt, cutoff)
+            if delay is None:
                 raise
-            if code == 429:
-                max_attempts = MAX_ATTEMPTS_429
-            else:
-                max_attempts = MAX_ATTEMPTS_OTHER
-            if attempt >= max_attempts - 1:
+            time.sleep(delay)
+            attempt += 1
+
+
+async def retry_http_async(fn, *, deadline: float | None = None):
+    """Async retry_http: await fn() with the same policy, sleeping without blocking the event loop."""
+    cutoff = _cutoff(deadline)
+    retry_budget.record_call()
+    attempt = 0
+    while True:
+        try:
+            return await fn()
+        except httpx.HTTPStatusError as e:
+            delay = _retry_delay(e, attempt, cutoff)
+            if delay is None:
                 raise
-            if code == 429:
-                time.sleep(BACKOFF_429_SEC)
-            else:
-                time.sleep(2**attempt)
+            await asyncio.sleep(delay)
             attempt += 1
+
+
+def _cutoff(deadline: float | None) -> float:
+    """Latest monotonic time a retry may start: the per-call cap or the caller's deadline."""
+    cap = time.monotonic() + config.RETRY_MAX_TOTAL_SEC
+    return cap if deadline is None else min(cap, deadline)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date). None if absent/invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with equal jitter: half fixed, half random."""
+    base = min(config.RETRY_MAX_BACKOFF_SEC, BACKOFF_BASE_SEC * 2**attempt)
+    return base / 2 + random.uniform(0, base / 2)
+
+
+def _retry_delay(e: httpx.HTTPStatusError, attempt: int, cutoff: float) -> float | None:
+    """Seconds to wait before the next attempt, or None if e should be re-raised."""
+    code = e.response.status_code
+    if code not in RETRY_STATUSES:
+        return None
+    if code == 429:
+        max_attempts = MAX_ATTEMPTS_429
+    else:
+        max_attempts = MAX_ATTEMPTS_OTHER
+    if attempt >= max_attempts - 1:
+        return None
+    retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+    if retry_after is not None:
+        # Small jitter on top so clients told the same Retry-After don't return in lockstep
+        delay = retry_after + random.uniform(0, min(1.0, retry_after * 0.1))
+    elif code == 429:
+        delay = BACKOFF_429_SEC
+    else:
+        delay = _backoff(attempt)
+    if delay > config.RETRY_MAX_BACKOFF_SEC or time.monotonic() + delay >= cutoff:
+        return None
+    if not retry_budget.try_acquire():
+        return None
+    return delay
@@ -0,0 +1,99 @@
+"""Single-flight coalescing of identical concurrent async calls.
+
+Concurrent callers with the same key share one in-flight task and all receive its
+result or exception. A caller that is cancelled only stops waiting; the shared task
+is cancelled once no callers are left waiting on it.
+
+Deadlines: a shared task runs under the deadline of the caller that started it. A caller
+joins a flight whose deadline is no more than join_slack (SINGLEFLIGHT_JOIN_SLACK_MS)
+earlier than its own, so a burst of requests with the default timeout, each a few ms
+later than the last, still makes one upstream call; it may give up to join_slack of its
+budget. A caller with much more time than the running flight (e.g. after a client with
+a short X-Request-Timeout-Ms started it) starts a fresh flight instead, which later
+callers join. Each caller also stops waiting at its own deadline, so a short-deadline
+client can neither fail nor be held up by others' identical requests.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+import config
+from utils.deadline import Deadline, DeadlineExceeded
+
+
+class _Call:
+    __slots__ = ("task", "waiters", "deadline")
+
+    def __init__(self, task: asyncio.Task, deadline: Deadline | None) -> None:
+        self.task = task
+        self.waiters = 0
+        self.deadline = deadline
+
+    def covers(self, deadline: Deadline | None, slack: float) -> bool:
+        """True if this flight runs at most `slack` seconds shorter than a caller with `deadline` may wait."""
+        if self.deadline is None:
+            return True
+        return deadline is not None and self.deadline.expires_at + slack >= deadline.expires_at
+
+
+class SingleFlight:
+    """Coalesce concurrent calls per key; counters report how many calls were shared."""
+
+    def __init__(self, name: str, *, join_slack: float | None = None) -> None:
+        self.name = name
+        if join_slack is None:
+            join_slack = config.SINGLEFLIGHT_JOIN_SLACK_MS / 1000
+        self.join_slack = join_slack
+        self._inflight: dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.cancelled = 0
+        self.deadline_splits = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], *, deadline: Deadline | None = None) -> Any:
+        """Await fn() once per key among concurrent callers; everyone gets the same outcome.
+
+        fn must run under `deadline` (the caller's own). Raises DeadlineExceeded if the
+        shared call outlives this caller's deadline.
+        """
+        self.calls += 1
+        call = self._inflight.get(key)
+        if call is not None and call.covers(deadline, self.join_slack):
+            self.coalesced += 1
+        else:
+            if call is not None:
+                # The running flight would give up well before this caller's deadline
+                self.deadline_splits += 1
+            call = _Call(asyncio.ensure_future(fn()), deadline)
+            self._inflight[key] = call
+            call.task.add_done_callback(lambda _t, k=key, c=call: self._forget(k, c))
+            self.executed += 1
+        call.waiters += 1
+        try:
+            if deadline is None or call.deadline is deadline:
+                return await asyncio.shield(call.task)
+            try:
+                return await asyncio.wait_for(asyncio.shield(call.task), deadline.remaining())
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded() from None
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Last waiter gave up (cancelled/disconnected/out of time): abort the upstream call
+                self._forget(key, call)
+                call.task.cancel()
+                self.cancelled += 1
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._inflight.get(key) is call:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self.calls,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "deadline_splits": self.deadline_splits,
+            "cancelled": self.cancelled,
+        }